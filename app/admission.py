@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+from .config import settings
+from .deadline import DeadlineExceeded
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_LIMIT, ADMISSION_QUEUED, ADMISSION_SHED
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is overloaded, retry after {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue. Callers beyond the limit wait up to
+    queue_timeout; once the queue is full (or the wait expires) they are shed with
+    OverloadedError instead of piling up.
+
+    With a target_latency the limit adapts AIMD-style: +1/limit per call that finishes
+    within the target, x ADMISSION_BACKOFF_RATIO (at most once per target_latency) when a
+    call is slower or fails. Calls cancelled or cut off by the turn deadline are not failures.
+    Without one the limit is fixed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        target_latency: Optional[float] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+    ):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit or limit
+        self.max_limit = max_limit or limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency_ewma = 0.0
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.labels(name).set(limit)
+
+    def _retry_after(self) -> int:
+        # Roughly how long the current queue takes to drain at the current limit
+        backlog = 1 + len(self._waiters) / max(1.0, self.limit)
+        return max(1, math.ceil(self._latency_ewma * backlog))
+
+    def _shed(self) -> OverloadedError:
+        self.shed += 1
+        ADMISSION_SHED.labels(self.name).inc()
+        return OverloadedError(self.name, self._retry_after())
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self._take()
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed()
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        ADMISSION_QUEUED.labels(self.name).inc()
+        try:
+            # asyncio.wait (unlike wait_for) never cancels the future, so a slot handed over
+            # at the deadline is not lost
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        finally:
+            ADMISSION_QUEUED.labels(self.name).dec()
+
+        if not future.done():
+            self._abandon(future)
+            raise self._shed()
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        if future.done():
+            # The slot was already handed to us; pass it on
+            self.release()
+            return
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _take(self) -> None:
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.labels(self.name).inc()
+
+    def release(self, latency: Optional[float] = None, failed: bool = False) -> None:
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels(self.name).dec()
+        if latency is not None:
+            self._observe(latency, failed)
+
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self._take()
+                future.set_result(None)
+
+    def _observe(self, latency: float, failed: bool) -> None:
+        self._latency_ewma = latency if not self._latency_ewma else 0.8 * self._latency_ewma + 0.2 * latency
+        if self.target_latency is None:
+            return
+
+        if failed or latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(float(self.min_limit), self.limit * settings.ADMISSION_BACKOFF_RATIO)
+                logger.info(f"[Admission] {self.name} limit lowered to {int(self.limit)}")
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        ADMISSION_LIMIT.labels(self.name).set(int(self.limit))
+
+    def _release_interrupted(self, start: float) -> None:
+        # Cut short by the caller (disconnect, turn budget), not by the backend: it only counts
+        # as a slow call if it had already overrun the target, never as a failure
+        elapsed = time.perf_counter() - start
+        known_slow = self.target_latency is not None and elapsed > self.target_latency
+        self.release(elapsed if known_slow else None)
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        except DeadlineExceeded:
+            self._release_interrupted(start)
+            raise
+        except Exception:
+            self.release(time.perf_counter() - start, failed=True)
+            raise
+        except BaseException:
+            self._release_interrupted(start)
+            raise
+        else:
+            self.release(time.perf_counter() - start)
+
+    async def run_in_executor(self, executor: Executor, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run blocking `fn` on `executor` under a slot that is held until the thread finishes, not
+        only until the caller stops waiting: an abandoned boto3 call still occupies the backend.
+        A call cancelled before its thread started frees the slot straight away.
+        """
+        await self.acquire()
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self.release()
+            raise
+
+        def finished(done: Future) -> None:
+            if done.cancelled():
+                release = (self.release,)
+            else:
+                release = (self.release, time.perf_counter() - start, done.exception() is not None)
+            try:
+                loop.call_soon_threadsafe(*release)
+            except RuntimeError:
+                pass  # Loop already closed at shutdown
+
+        future.add_done_callback(finished)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "shed": self.shed,
+        }
+
+
+# Global cap on turns in flight in this worker; fixed, since turn latency is dominated by the backends below
+turn_limiter = AdaptiveLimiter(
+    "turn",
+    limit=settings.ADMISSION_MAX_IN_FLIGHT_TURNS,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+
+bedrock_limiter = AdaptiveLimiter(
+    "bedrock",
+    limit=settings.BEDROCK_CONCURRENCY_LIMIT,
+    min_limit=settings.BEDROCK_CONCURRENCY_MIN,
+    max_limit=settings.BEDROCK_MAX_WORKERS,
+    max_queue=settings.BACKEND_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    target_latency=settings.BEDROCK_TARGET_LATENCY_SECONDS,
+)
+
+_backend_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_backend_limiter(backend: str) -> AdaptiveLimiter:
+    """
+    One limiter per downstream service ("intent", "sentiment", "rag", "tools"), shared by all
+    of its endpoints so the service as a whole is bounded and sheds; breakers stay per endpoint.
+    """
+    limiter = _backend_limiters.get(backend)
+    if limiter is None:
+        limiter = _backend_limiters[backend] = AdaptiveLimiter(
+            backend,
+            limit=settings.BACKEND_CONCURRENCY_LIMIT,
+            min_limit=settings.BACKEND_CONCURRENCY_MIN,
+            max_limit=settings.BACKEND_CONCURRENCY_MAX,
+            max_queue=settings.BACKEND_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            target_latency=settings.BACKEND_TARGET_LATENCY_SECONDS,
+        )
+    return limiter
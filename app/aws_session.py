@@ -1,11 +1,18 @@
 import boto3
 import os
+import threading
+from datetime import datetime, timedelta, timezone
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 from .config import settings
+from .metrics import BEDROCK_CLIENT_RESULTS, BEDROCK_CREDENTIALS_EXPIRY
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Error codes returned once the credentials a client was built with are no longer valid
+EXPIRED_CREDENTIAL_CODES = {"ExpiredToken", "ExpiredTokenException", "RequestExpired"}
+
 
 def is_running_on_aws():
     """Check if running in AWS environment like ECS, EC2, or Lambda"""
@@ -16,29 +23,41 @@ def is_running_on_aws():
     )
 
 
-def get_bedrock_client_with_sts():
+def _bedrock_client_config():
+    # Size the connection pool to match the Bedrock worker threads in nodes.py, and bound each call
+    # (every attempt, connect plus read) by the longest turn budget instead of botocore's 60s and retries
+    attempts = max(1, settings.BEDROCK_MAX_ATTEMPTS)
+    read_timeout = max(1.0, settings.REQUEST_DEADLINE_MAX_SECONDS / attempts - settings.BEDROCK_CONNECT_TIMEOUT_SECONDS)
+    return Config(
+        max_pool_connections=settings.BEDROCK_MAX_WORKERS,
+        connect_timeout=settings.BEDROCK_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=read_timeout,
+        retries={"mode": "standard", "total_max_attempts": attempts},
+    )
+
+
+def _create_bedrock_client():
+    """Build a bedrock-runtime client; returns (client, credential expiration or None)."""
     try:
-        # If running on AWS (Fargate, EC2, Lambda), use default credentials (e.g., task role)
+        # If running on AWS (Fargate, EC2, Lambda), use default credentials (e.g., task role).
+        # botocore refreshes task-role credentials itself, so the client never expires here.
         if is_running_on_aws():
             session = boto3.Session()
-            caller = session.client("sts").get_caller_identity()
-            #print(f"[INFO] Using AWS environment credentials for: {caller['Arn']}")
-
-            return boto3.client(
+            client = session.client(
                 "bedrock-runtime",
-                region_name=settings.BEDROCK_REGION
+                region_name=settings.BEDROCK_REGION,
+                endpoint_url=settings.BEDROCK_ENDPOINT_URL or None,
+                config=_bedrock_client_config()
             )
+            return client, None
 
         # If running locally, use configured profile and assume role
         print("[INFO] Detected local environment. Assuming role...")
 
         profile_name = getattr(settings, "AWS_PROFILE", None)
-        session = boto3.Session(profile_name=profile_name)
+        session = boto3.Session(profile_name=profile_name or None)
 
         sts = session.client("sts")
-        caller = sts.get_caller_identity()
-        #print(f"[INFO] Using AWS_PROFILE: {profile_name}, identity: {caller['Arn']}")
-
         response = sts.assume_role(
             RoleArn=settings.ASSUME_ROLE_ARN,
             RoleSessionName="LangGraphBedrockSession"
@@ -46,13 +65,16 @@ def get_bedrock_client_with_sts():
 
         credentials = response["Credentials"]
 
-        return boto3.client(
+        client = boto3.client(
             "bedrock-runtime",
             region_name=settings.BEDROCK_REGION,
             aws_access_key_id=credentials["AccessKeyId"],
             aws_secret_access_key=credentials["SecretAccessKey"],
-            aws_session_token=credentials["SessionToken"]
+            aws_session_token=credentials["SessionToken"],
+            endpoint_url=settings.BEDROCK_ENDPOINT_URL or None,
+            config=_bedrock_client_config()
         )
+        return client, credentials["Expiration"]
 
     except ClientError as e:
         logger.error(f"[LangGraph Error] {str(e)}", exc_info=True)
@@ -60,3 +82,61 @@ def get_bedrock_client_with_sts():
     except BotoCoreError as e:
         logger.error(f"[LangGraph Error] {str(e)}", exc_info=True)
         raise RuntimeError(f"[ERROR] BotoCoreError: {e}")
+
+
+class BedrockClientCache:
+    """Reuses one pooled Bedrock client, refreshing assumed-role credentials before they expire."""
+
+    def __init__(self, refresh_margin_seconds: float):
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._lock = threading.Lock()
+        self._client = None
+        self._expiration = None
+
+    def _is_fresh(self) -> bool:
+        if self._client is None:
+            return False
+        if self._expiration is None:
+            return True
+        return datetime.now(timezone.utc) < self._expiration - self.refresh_margin
+
+    def get_client(self):
+        if self._is_fresh():
+            BEDROCK_CLIENT_RESULTS.labels("hit").inc()
+            return self._client
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._is_fresh():
+                BEDROCK_CLIENT_RESULTS.labels("hit").inc()
+                return self._client
+
+            self._client, self._expiration = _create_bedrock_client()
+            BEDROCK_CLIENT_RESULTS.labels("refresh").inc()
+            BEDROCK_CREDENTIALS_EXPIRY.set(self._expiration.timestamp() if self._expiration else 0)
+            logger.info(f"[AWS] Bedrock client refreshed (expires={self._expiration})")
+            return self._client
+
+    def invalidate(self, client=None):
+        """Drop the cached client so the next call rebuilds it; a no-op if `client` was already replaced."""
+        with self._lock:
+            if client is not None and client is not self._client:
+                return
+            self._client = None
+            self._expiration = None
+            BEDROCK_CLIENT_RESULTS.labels("invalidated").inc()
+
+
+bedrock_client_cache = BedrockClientCache(refresh_margin_seconds=settings.AWS_CREDENTIAL_REFRESH_MARGIN_SECONDS)
+
+
+def get_bedrock_client_with_sts():
+    return bedrock_client_cache.get_client()
+
+
+def invalidate_if_expired(client, error: ClientError) -> None:
+    """Credentials can be revoked or expire early (clock skew, session policy); rebuild on the next call."""
+    code = error.response.get("Error", {}).get("Code")
+    if code in EXPIRED_CREDENTIAL_CODES:
+        logger.warning(f"[AWS] Bedrock credentials rejected ({code}); client will be refreshed")
+        bedrock_client_cache.invalidate(client)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .admission import get_backend_limiter
+from .http_client import get_async_client
+from .metrics import CLASSIFIER_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean "this endpoint does not take batches"
+_BATCH_UNSUPPORTED_STATUS = {404, 405, 415, 422}
+
+
+class MicroBatcher:
+    """
+    Collects single-text classifier requests arriving within a short window and sends
+    them as one batched call, fanning the per-text results back out to the callers.
+
+    Batched endpoints receive {"texts": [...]} and must return a list of per-text
+    objects (top-level or under "results") shaped like the single-text response.
+    Without a batch URL, or once the batch endpoint rejects a batch, every text is
+    posted individually to the single-text URL.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        single_url: str,
+        batch_url: Optional[str],
+        window_ms: float,
+        max_batch_size: int,
+        timeout: float,
+    ):
+        self.name = name
+        self.single_url = single_url
+        self.batch_url = batch_url or None
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks, so in-flight sends are held here
+        self._sending: Set[asyncio.Task] = set()
+
+    async def _post_single(self, text: str) -> Dict[str, Any]:
+        async with get_backend_limiter(self.name).slot():
+            r = await get_async_client().post(self.single_url, json={"text": text}, timeout=self.timeout)
+            r.raise_for_status()
+        return r.json()
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        if self.batch_url is None:
+            return await self._post_single(text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_now()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush_now)
+
+        return await future
+
+    def _flush_now(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.window, self._flush_now)
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Callers that already timed out are dropped from the batch
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        try:
+            results = await self._send_batch([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        CLASSIFIER_BATCH_SIZE.labels(self.name).observe(len(texts))
+
+        if self.batch_url is not None and len(texts) > 1:
+            async with get_backend_limiter(self.name).slot():
+                r = await get_async_client().post(self.batch_url, json={"texts": texts}, timeout=self.timeout)
+            if r.status_code not in _BATCH_UNSUPPORTED_STATUS:
+                r.raise_for_status()
+                body = r.json()
+                results = body.get("results") if isinstance(body, dict) else body
+                if isinstance(results, list) and len(results) == len(texts):
+                    return results
+                raise ValueError(f"[{self.name}] Batch response does not match request size")
+
+            logger.warning(f"[{self.name}] Batch endpoint returned {r.status_code}; falling back to single-text calls")
+            self.batch_url = None
+
+        return list(await asyncio.gather(*(self._post_single(text) for text in texts)))
@@ -1,3 +1,4 @@
+from typing import Dict, List, Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -75,10 +76,194 @@ class Settings(BaseSettings):
     REDIS_PORT: str
     BEDROCK_REGION: str
     BEDROCK_MODEL_ID: str
+    # Optional override, e.g. a VPC endpoint or the local stand-in used by bench/
+    BEDROCK_ENDPOINT_URL: str = ""
+    # botocore socket timeouts and attempts; the read timeout is derived so that all attempts fit
+    # within REQUEST_DEADLINE_MAX_SECONDS, since an abandoned call keeps its worker thread until then
+    BEDROCK_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    BEDROCK_MAX_ATTEMPTS: int = 1
+
+    # Seconds between checks for a changed INTENT_TOOL_MAP.json (0 = every request)
+    TOOL_REGISTRY_RELOAD_CHECK_SECONDS: float = 30.0
+
+    # Per-branch timeouts for the parallel intent/sentiment classifiers
+    INTENT_TIMEOUT_SECONDS: float = 3.0
+    SENTIMENT_TIMEOUT_SECONDS: float = 2.0
+
+    # Classifier micro-batching; leave the batch URLs empty for single-text endpoints
+    INTENT_BATCH_API_URL: str = ""
+    SENTIMENT_BATCH_API_URL: str = ""
+    CLASSIFIER_BATCH_WINDOW_MS: float = 5.0
+    CLASSIFIER_MAX_BATCH_SIZE: int = 32
+
+    # Shared async HTTP pool and Bedrock worker threads
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    BEDROCK_MAX_WORKERS: int = 64
+
+    # End-to-end budget per turn (a request may ask for a different one via "deadline_ms"); nodes derive
+    # their timeouts from what is left and skip optional work when it runs low
+    REQUEST_DEADLINE_SECONDS: float = 25.0
+    REQUEST_DEADLINE_MAX_SECONDS: float = 60.0
+    # Budget that must still be left when the classifiers join; sentiment is cut short to keep it
+    BEDROCK_MIN_BUDGET_SECONDS: float = 1.0
+    DISCONNECT_POLL_SECONDS: float = 0.5
+
+    # /chat/batch: sessions run concurrently (turns within a session stay in order)
+    CHAT_BATCH_PARALLELISM: int = 16
+    CHAT_BATCH_MAX_PARALLELISM: int = 64
+    CHAT_BATCH_MAX_ITEMS: int = 10000
+
+    # Fast path: skip Bedrock when the intent is confidently classified and its tool's required arguments
+    # can be read straight from the message. Only the intents listed here qualify: RAG and read-only
+    # lookups, since a wrong guess must never change a booking or send anything
+    FAST_PATH_ENABLED: bool = False
+    FAST_PATH_MIN_CONFIDENCE: float = 0.9
+    FAST_PATH_INTENTS: List[str] = [
+        "check_baggage_allowance",
+        "check_cancellation_fee",
+        "check_flight_insurance_coverage",
+        "check_trip_insurance_coverage",
+        "search_flight_insurance",
+        "search_trip_insurance",
+        "query_policy_rag_db",
+        "get_flight_status",
+        "get_trip_cancellation_policy",
+        "get_excursion_cancellation_policy",
+        "get_trip_segments",
+        "check_seat_availability",
+    ]
+
+    # Admission control: a fixed cap on in-flight turns, plus AIMD limits for Bedrock and each downstream service
+    # (intent, sentiment, RAG, tools) that shrink when calls exceed their target latency. Excess callers wait in a
+    # bounded queue, then get a 503.
+    ADMISSION_MAX_IN_FLIGHT_TURNS: int = 256
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_BACKOFF_RATIO: float = 0.9
+    BEDROCK_CONCURRENCY_LIMIT: int = 32
+    BEDROCK_CONCURRENCY_MIN: int = 4
+    BEDROCK_TARGET_LATENCY_SECONDS: float = 8.0
+    BACKEND_CONCURRENCY_LIMIT: int = 32
+    BACKEND_CONCURRENCY_MIN: int = 2
+    BACKEND_CONCURRENCY_MAX: int = 128
+    BACKEND_TARGET_LATENCY_SECONDS: float = 2.0
+    BACKEND_MAX_QUEUE: int = 128
+
+    # Tool backends: timeouts (per-tool overrides as JSON), retries for read-only tools, circuit breakers
+    TOOL_TIMEOUT_SECONDS: float = 5.0
+    RAG_TIMEOUT_SECONDS: float = 10.0
+    TOOL_TIMEOUT_OVERRIDES: Dict[str, float] = {}
+    TOOL_MAX_RETRIES: int = 2
+    # Only these are retried: a timeout after a state-changing backend committed would repeat the change
+    TOOL_RETRYABLE: List[str] = [
+        "check_baggage_allowance",
+        "check_cancellation_fee",
+        "check_flight_insurance_coverage",
+        "check_trip_insurance_coverage",
+        "search_flight_insurance",
+        "search_trip_insurance",
+        "query_policy_rag_db",
+        "get_flight_status",
+        "check_flight_status",
+        "check_arrival_time",
+        "check_departure_time",
+        "get_trip_cancellation_policy",
+        "get_excursion_cancellation_policy",
+        "get_airline_checkin_baggage_info",
+        "get_check_in_info",
+        "get_phone_checkin_info",
+        "query_airport_checkin_info",
+        "get_trip_segments",
+        "check_seat_availability",
+    ]
+    TOOL_RETRY_BASE_DELAY_SECONDS: float = 0.1
+    TOOL_RETRY_MAX_DELAY_SECONDS: float = 1.0
+    TOOL_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    TOOL_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Tool outputs enter the conversation as compact JSON capped at this size; the full payload is kept in Redis
+    TOOL_OUTPUT_MAX_CHARS: int = 4000
+    TOOL_OUTPUT_STORE_TTL_SECONDS: int = 3600 * 24 * 5
+
+    # Tool calls from one assistant turn run concurrently, bounded per turn; each call gets its own deadline
+    TOOL_MAX_PARALLEL_CALLS: int = 4
+    TOOL_MAX_CALLS_PER_TURN: int = 8
+    TOOL_CALL_DEADLINE_SECONDS: float = 15.0
+
+    # TTL cache for read-only tool and RAG responses; only tools listed here are cached (TTL in seconds)
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_MAX_ENTRIES: int = 2048
+    TOOL_CACHE_TTLS: Dict[str, int] = {
+        "get_flight_status": 30,
+        "check_flight_status": 30,
+        "check_arrival_time": 60,
+        "check_departure_time": 60,
+        "get_trip_cancellation_policy": 3600,
+        "get_excursion_cancellation_policy": 3600,
+        "get_airline_checkin_baggage_info": 3600,
+        "get_check_in_info": 3600,
+        "get_phone_checkin_info": 3600,
+        "query_airport_checkin_info": 3600,
+        "check_baggage_allowance": 3600,
+        "check_cancellation_fee": 3600,
+        "check_flight_insurance_coverage": 3600,
+        "check_trip_insurance_coverage": 3600,
+        "search_flight_insurance": 3600,
+        "search_trip_insurance": 3600,
+        "query_policy_rag_db": 3600,
+    }
+
+    # Conversation history window sent to Bedrock and kept in the checkpoint
+    HISTORY_TOKEN_BUDGET: int = 3000
+    HISTORY_MIN_RECENT_MESSAGES: int = 4
+    HISTORY_TOOL_RESPONSE_MAX_CHARS: int = 2000
+    HISTORY_SUMMARY_MAX_CHARS: int = 2000
+    HISTORY_AUDIT_ENABLED: bool = True
+    # Serves full audit transcripts at /history/{session_id} with no auth check; enable only
+    # on a deployment that is not reachable from the public listener
+    HISTORY_ENDPOINT_ENABLED: bool = False
+
+    # Emit an OpenTelemetry span per graph node (requires opentelemetry-api in the image)
+    OTEL_ENABLED: bool = False
+
+    # Checkpoint persistence: "every_step" (one write per node), "end" (one write per turn)
+    # or "tool_boundary" (before the tool runs and at the end of the turn)
+    CHECKPOINT_MODE: Literal["every_step", "end", "tool_boundary"] = "end"
+    # "redis" in production; "memory" keeps checkpoints in-process (local runs without Redis Stack)
+    CHECKPOINT_BACKEND: Literal["redis", "memory"] = "redis"
+    CHECKPOINT_TTL_MINUTES: int = 60 * 24 * 5
+    CHECKPOINT_REFRESH_ON_READ: bool = True
+    # "checkpoint" keeps the message window in graph state; "redis_list" keeps messages only
+    # in the append-only per-thread list and reloads the window each turn
+    MESSAGE_STORE: Literal["checkpoint", "redis_list"] = "checkpoint"
+
+    # Threads whose rendered prompt prefix is kept in-process for incremental rendering
+    PROMPT_CACHE_MAX_THREADS: int = 2048
+
+    # Exact-match Bedrock response cache; conversations matching an exclude pattern are never cached
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_TTL_SECONDS: int = 3600 * 24
+    LLM_CACHE_MAX_ENTRIES: int = 50000
+    LLM_CACHE_MAX_RESPONSE_CHARS: int = 8000
+    LLM_CACHE_EXCLUDE_PATTERNS: List[str] = [
+        r"\b(?=[A-Z0-9]*\d)(?=[A-Z0-9]*[A-Z])[A-Z0-9]{5,8}\b",  # booking references, PNRs, flight numbers
+        r"\b[A-Z]{1,3}-\d{3,}\b",                                # trip / policy ids like T-7781
+        r"[\w.+-]+@[\w-]+\.[\w.]+",                              # email addresses
+        r"\d{6,}",                                                # phone, card and confirmation numbers
+    ]
+
+    # Background warm-up after startup (Bedrock client, Redis and HTTP pools); /ready returns 503 until it finishes
+    WARMUP_ENABLED: bool = True
+    WARMUP_HTTP_TIMEOUT_SECONDS: float = 3.0
+    WARMUP_HTTP_CONNECTIONS_PER_BACKEND: int = 2
+    WARMUP_REDIS_CONNECTIONS: int = 4
 
     # Optional for STS
     AWS_PROFILE: str = ""
     ASSUME_ROLE_ARN: str = ""
+    # Refresh assumed-role credentials this long before their Expiration
+    AWS_CREDENTIAL_REFRESH_MARGIN_SECONDS: float = 300.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,30 @@
+import time
+from typing import Optional
+from langchain_core.runnables import RunnableConfig
+from .config import settings
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def deadline_after(budget_ms: Optional[float] = None) -> float:
+    """Absolute (monotonic) deadline for a turn; requested budgets are capped at REQUEST_DEADLINE_MAX_SECONDS."""
+    budget = settings.REQUEST_DEADLINE_SECONDS if budget_ms is None else budget_ms / 1000.0
+    return time.monotonic() + min(budget, settings.REQUEST_DEADLINE_MAX_SECONDS)
+
+
+def remaining(config: RunnableConfig) -> Optional[float]:
+    """Seconds left in the turn's budget, or None when the run has no deadline."""
+    deadline = (config or {}).get("configurable", {}).get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget_timeout(config: RunnableConfig, default: Optional[float], stage: str) -> Optional[float]:
+    """The smaller of a stage's own timeout and the remaining budget; raises once the budget is spent."""
+    left = remaining(config)
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline passed before {stage}")
+    return left if default is None else min(default, left)
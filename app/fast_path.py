@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Callable, Dict, List, Mapping, Optional
+from .config import settings
+
+# Six-character record locators mixing letters and digits (YEYE2K, ABC123); flight-number
+# shaped tokens (UA1234) are left to the model since they are ambiguous
+_BOOKING_REF_RE = re.compile(r"\b(?=[A-Z0-9]*\d)(?=[A-Z0-9]*[A-Z])[A-Z0-9]{6}\b")
+_FLIGHT_NUMBER_RE = re.compile(r"\b([A-Z]{2})\s?(\d{1,4})\b")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+
+def _single(candidates: List[str]) -> Optional[str]:
+    # Only an unambiguous match is used; anything else goes to the model
+    distinct = list(dict.fromkeys(candidates))
+    return distinct[0] if len(distinct) == 1 else None
+
+
+def _booking_reference(text: str) -> Optional[str]:
+    return _single([m for m in _BOOKING_REF_RE.findall(text) if not _FLIGHT_NUMBER_RE.fullmatch(m)])
+
+
+def _flight_number(text: str) -> Optional[str]:
+    return _single([airline + number for airline, number in _FLIGHT_NUMBER_RE.findall(text)])
+
+
+def _email(text: str) -> Optional[str]:
+    return _single(_EMAIL_RE.findall(text))
+
+
+def _phone_number(text: str) -> Optional[str]:
+    return _single([re.sub(r"[\s().-]", "", m) for m in _PHONE_RE.findall(text)])
+
+
+def _query(text: str) -> Optional[str]:
+    return text.strip() or None
+
+
+# Parameter name -> extractor; intents needing any other required parameter take the LLM path
+EXTRACTORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "booking_reference": _booking_reference,
+    "confirmation_number": _booking_reference,
+    "flight_number": _flight_number,
+    "email": _email,
+    "phone_number": _phone_number,
+    "query": _query,
+}
+
+
+def extract_arguments(tool: Mapping, text: str) -> Optional[dict]:
+    """Fill every required parameter of `tool` from the text, or return None if any is missing."""
+    arguments = {}
+    for param in tool["parameters"].get("required", []):
+        extractor = EXTRACTORS.get(param)
+        value = extractor(text) if extractor else None
+        if value is None:
+            return None
+        arguments[param] = value
+    return arguments
+
+
+def build_fast_tool_call(tool: Mapping, text: str, intent: str, confidence: float, is_rag: bool) -> Optional[str]:
+    """
+    Tool-call JSON for a turn that can skip Bedrock, or None. Only intents in
+    FAST_PATH_INTENTS qualify, and only when the intent was confidently classified this
+    turn and every required argument is found in the user text.
+    """
+    if not settings.FAST_PATH_ENABLED or intent not in settings.FAST_PATH_INTENTS:
+        return None
+    if confidence < settings.FAST_PATH_MIN_CONFIDENCE:
+        return None
+
+    name = tool["name"]
+    # A lookup with nothing to look up is left to the model, which may fill optional arguments
+    if not (is_rag or tool["parameters"].get("required")):
+        return None
+
+    arguments = extract_arguments(tool, text)
+    if arguments is None:
+        return None
+    if is_rag:
+        # RAG backends answer from a free-text query; pass the user's question through
+        arguments.setdefault("query", text.strip())
+    return json.dumps({"name": name, "arguments": arguments})
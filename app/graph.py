@@ -1,50 +1,161 @@
 # app/graph.py
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.redis import RedisSaver
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
 from .config import settings
 from .state import GraphState
 from .nodes import (
     classify_intent,
     classify_sentiment,
+    fast_path,
     call_travel_or_rag_api,
     parse_tool_call,
     append_tool_result,
-    call_bedrock_model
+    call_bedrock_model,
+    manage_history
 )
-import redis
+import logging
+import threading
+from .redis_client import redis_client
+from .metrics import CHECKPOINT_LATENCY, instrument_node
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever nodes or edges below change; logged on compile so deploys can be told apart
+GRAPH_VERSION = "5"
+
+
+class InstrumentedAsyncRedisSaver(AsyncRedisSaver):
+    """AsyncRedisSaver that records checkpoint read/write latency."""
+
+    async def aget_tuple(self, config):
+        with CHECKPOINT_LATENCY.labels("read").time():
+            return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions, *args, **kwargs):
+        with CHECKPOINT_LATENCY.labels("write").time():
+            return await super().aput(config, checkpoint, metadata, new_versions, *args, **kwargs)
+
+    async def aput_writes(self, config, writes, task_id, *args, **kwargs):
+        with CHECKPOINT_LATENCY.labels("write_pending").time():
+            return await super().aput_writes(config, writes, task_id, *args, **kwargs)
 
 
 class WorkflowFactory:
-    def __init__(self, redis_url: str):
-        self.redis_client = redis.Redis.from_url(redis_url)
-        self.saver = RedisSaver(
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        # AsyncRedisSaver binds to the running loop, so it is created in setup()
+        self.saver = None
+
+        # Process-wide compiled graph, shared by every request
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    async def setup(self):
+        if settings.CHECKPOINT_BACKEND == "memory":
+            self.saver = MemorySaver()
+            self.reload()
+            return
+
+        self.saver = InstrumentedAsyncRedisSaver(
             redis_client=self.redis_client,
             ttl={
-                "default_ttl": 3600 * 24 * 5,     # 5 days TTL in seconds
-                "refresh_on_read": True           # Optional: resets TTL on every access
+                "default_ttl": settings.CHECKPOINT_TTL_MINUTES,             # RedisSaver TTL is in minutes
+                "refresh_on_read": settings.CHECKPOINT_REFRESH_ON_READ      # Resets TTL on every access (extra writes)
             }
         )
+        await self.saver.asetup()  # Ensure required indices are created
+        self.reload()              # Compile once during startup
 
+    async def close(self):
+        await self.redis_client.aclose()
 
-    def setup(self):
-        self.saver.setup()  # Ensure required indices are created
+    def build_workflow(self):
+        if self.saver is None:
+            raise RuntimeError("WorkflowFactory.setup() must be awaited before building the workflow")
 
-    def get_workflow(self):
         wf = StateGraph(GraphState)
 
-        wf.add_node("intent_classifier", classify_intent)
-        wf.add_node("sentiment_classifier", classify_sentiment)
-        wf.add_node("bedrock_inference", call_bedrock_model)
-        wf.add_node("parse_tool_call", parse_tool_call)
-        wf.add_node("call_tool", call_travel_or_rag_api)
-        wf.add_node("append_tool_output", append_tool_result)
+        nodes = {
+            "intent_classifier": classify_intent,
+            "sentiment_classifier": classify_sentiment,
+            "manage_history": manage_history,
+            "fast_path": fast_path,
+            "bedrock_inference": call_bedrock_model,
+            "parse_tool_call": parse_tool_call,
+            "call_tool": call_travel_or_rag_api,
+            "append_tool_output": append_tool_result,
+        }
+        for name, fn in nodes.items():
+            wf.add_node(name, instrument_node(name, fn))
 
-        wf.set_entry_point("intent_classifier")
-        wf.add_edge("intent_classifier", "sentiment_classifier")
-        wf.add_edge("sentiment_classifier", "bedrock_inference")
+        # Fan out to both classifiers, then join before history windowing and inference
+        wf.add_edge(START, "intent_classifier")
+        wf.add_edge(START, "sentiment_classifier")
+        wf.add_edge(["intent_classifier", "sentiment_classifier"], "manage_history")
+        wf.add_edge("manage_history", "fast_path")
+        # A turn whose tool call was built directly skips Bedrock
+        wf.add_conditional_edges("fast_path", lambda state: state["route"], {
+            "fast_path": "parse_tool_call",
+            "llm": "bedrock_inference",
+        })
         wf.add_edge("bedrock_inference", "parse_tool_call")
         wf.add_edge("parse_tool_call", "call_tool")
         wf.add_edge("call_tool", "append_tool_output")
         wf.add_edge("append_tool_output", END)
 
         return wf.compile(checkpointer=self.saver)
+
+    def reload(self):
+        """Compile a fresh graph and swap it in; in-flight requests keep the old one."""
+        with self._lock:
+            compiled = self.build_workflow()
+            self._compiled = compiled
+            logger.info(f"[Workflow] Compiled graph (version={GRAPH_VERSION})")
+            return compiled
+
+    def get_workflow(self):
+        # Tool prompts and schemas are read from tool_registry on every turn (it hot-reloads
+        # INTENT_TOOL_MAP.json itself), so the compiled graph only changes with the code
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self.reload()
+        return compiled
+
+
+# Single factory per process: one Redis client, one saver, one compiled graph
+workflow_factory = WorkflowFactory(redis_client=redis_client)
+
+
+def _run_kwargs() -> dict:
+    """Checkpoint persistence for one turn, per CHECKPOINT_MODE."""
+    return {
+        # every_step: one checkpoint per super-step; otherwise only when the run exits or pauses
+        "checkpoint_during": settings.CHECKPOINT_MODE == "every_step",
+        # tool_boundary: pause (and persist) once the tool call is parsed, before it runs
+        "interrupt_after": ["parse_tool_call"] if settings.CHECKPOINT_MODE == "tool_boundary" else None,
+    }
+
+
+async def astream_turn(workflow, input: dict, config: dict, stream_mode: list):
+    """Run one chat turn, yielding (mode, chunk) pairs; a tool_boundary pause is resumed straight away."""
+    modes = list(dict.fromkeys([*stream_mode, "updates"]))
+    next_input = input
+    while True:
+        interrupted = False
+        async for mode, chunk in workflow.astream(next_input, config=config, stream_mode=modes, **_run_kwargs()):
+            if mode == "updates" and "__interrupt__" in chunk:
+                interrupted = True
+                continue
+            if mode in stream_mode:
+                yield mode, chunk
+        if not interrupted:
+            return
+        next_input = None
+
+
+async def ainvoke_turn(workflow, input: dict, config: dict) -> dict:
+    result = {}
+    async for _, values in astream_turn(workflow, input, config, ["values"]):
+        result = values
+    return result
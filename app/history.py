@@ -0,0 +1,143 @@
+import json
+import logging
+import re
+from typing import Dict, List, Tuple
+from .config import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, str]
+
+_TOOL_RESPONSE_RE = re.compile(r"<tool_response>(.*?)</tool_response>", re.DOTALL)
+_TOOL_CALL_RE = re.compile(r"<tool_call>(.*?)</tool_call>", re.DOTALL)
+_FULL_OUTPUT_REF_RE = re.compile(r"full output stored as (\S+?)\]$")
+_INPUT_PREFIX_RE = re.compile(r"^(\[intent=[^\]]*\])\[sentiment=[^\]]*\]\s*")
+
+# Summary line for a folded tool message; the LLM cache treats it like a tool message
+SUMMARY_TOOL_RESULT_PREFIX = "Tool result:"
+
+# Full conversation transcript for audit (and the message store when MESSAGE_STORE=redis_list)
+AUDIT_KEY_PREFIX = "chat_history"
+AUDIT_TTL_SECONDS = 3600 * 24 * 5
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting without a tokenizer
+    return len(text) // 4 + 1
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def trim_tool_response(content: str, max_chars: int) -> str:
+    def _trim(match):
+        payload = match.group(1)
+        if len(payload) <= max_chars:
+            return match.group(0)
+        dropped = len(payload) - max_chars
+        # Keep the pointer to the full payload if the tool output was already capped
+        ref = _FULL_OUTPUT_REF_RE.search(payload)
+        suffix = f"; full output stored as {ref.group(1)}" if ref else ""
+        return f"<tool_response>{payload[:max_chars]}…[truncated {dropped} chars{suffix}]</tool_response>"
+
+    return _TOOL_RESPONSE_RE.sub(_trim, content)
+
+
+def _keep_intent_tag(match) -> str:
+    return match.group(1) + " "
+
+
+def summarize_message(message: Message) -> str:
+    role = message.get("role")
+    content = message.get("content", "")
+
+    if role == "user":
+        # Keep the intent tag but drop the per-turn sentiment tag
+        return f"User: {_shorten(_INPUT_PREFIX_RE.sub(_keep_intent_tag, content), 200)}"
+    if role == "assistant":
+        tool_calls = _TOOL_CALL_RE.findall(content)
+        if tool_calls:
+            return f"Assistant called tool: {_shorten('; '.join(call.strip() for call in tool_calls), 200)}"
+        reply = content.split("Response:", 1)[-1]
+        return f"Assistant: {_shorten(reply, 200)}"
+    if role == "tool":
+        response = _TOOL_RESPONSE_RE.search(content)
+        return f"{SUMMARY_TOOL_RESULT_PREFIX} {_shorten(response.group(1) if response else content, 200)}"
+    return f"{role}: {_shorten(content, 200)}"
+
+
+def _append_summary(summary: str, messages: List[Message]) -> str:
+    lines = (summary.splitlines() if summary else []) + [summarize_message(m) for m in messages]
+    # Keep the most recent lines within the summary size cap
+    while lines and sum(len(line) + 1 for line in lines) > settings.HISTORY_SUMMARY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def compact_history(messages: List[Message], summary: str) -> Tuple[List[Message], str]:
+    """
+    Keep the most recent turns within HISTORY_TOKEN_BUDGET, folding older turns into the
+    running summary. Turns are dropped whole (from one user message to the next) so a
+    tool response is never separated from the call that produced it.
+    """
+    messages = [
+        {**m, "content": trim_tool_response(m["content"], settings.HISTORY_TOOL_RESPONSE_MAX_CHARS)}
+        if m.get("role") == "tool" and i < len(messages) - 1 else m
+        for i, m in enumerate(messages)
+    ]
+
+    total = sum(estimate_tokens(m.get("content", "")) for m in messages)
+    while total > settings.HISTORY_TOKEN_BUDGET and len(messages) > settings.HISTORY_MIN_RECENT_MESSAGES:
+        cut = next((i for i in range(1, len(messages)) if messages[i].get("role") == "user"), None)
+        if cut is None or len(messages) - cut < settings.HISTORY_MIN_RECENT_MESSAGES:
+            break
+        dropped, messages = messages[:cut], messages[cut:]
+        summary = _append_summary(summary, dropped)
+        total -= sum(estimate_tokens(m.get("content", "")) for m in dropped)
+
+    return messages, summary
+
+
+def uses_message_list() -> bool:
+    return settings.MESSAGE_STORE == "redis_list"
+
+
+async def record_messages(thread_id: str, *messages: Message) -> None:
+    """
+    Append messages to the per-thread transcript. In audit-only mode a failed write is logged
+    and the turn goes on; with MESSAGE_STORE=redis_list the list is the only copy, so it raises.
+    """
+    if not (settings.HISTORY_AUDIT_ENABLED or uses_message_list()) or not thread_id or not messages:
+        return
+    key = f"{AUDIT_KEY_PREFIX}:{thread_id}"
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, *(json.dumps(m) for m in messages))
+            pipe.expire(key, AUDIT_TTL_SECONDS)
+            await pipe.execute()
+    except Exception as e:
+        if uses_message_list():
+            logger.error(f"[History] Message store write failed for {thread_id}: {e}")
+            raise
+        logger.warning(f"[History] Audit write failed for {thread_id}: {e}")
+
+
+async def load_full_history(thread_id: str) -> List[Message]:
+    raw = await redis_client.lrange(f"{AUDIT_KEY_PREFIX}:{thread_id}", 0, -1)
+    return [json.loads(item) for item in raw]
+
+
+async def load_history_window(thread_id: str, offset: int) -> List[Message]:
+    """Messages from `offset` onwards; used as the working window when MESSAGE_STORE=redis_list."""
+    raw = await redis_client.lrange(f"{AUDIT_KEY_PREFIX}:{thread_id}", offset, -1)
+    return [json.loads(item) for item in raw]
+
+
+async def turn_messages(thread_id: str, messages: List[Message], history_offset: int) -> List[Message]:
+    """Messages to return for a finished turn, wherever MESSAGE_STORE keeps them."""
+    if uses_message_list():
+        return await load_history_window(thread_id, history_offset)
+    return messages
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+from .config import settings
+from .history import SUMMARY_TOOL_RESULT_PREFIX
+from .metrics import LLM_CACHE_RESULTS
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmcache"
+INDEX_KEY = f"{KEY_PREFIX}:index"  # sorted set of cached keys by insert time, used to bound the size
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of Bedrock completions, keyed on a hash of the full request (model ID,
+    sampling parameters, guardrail and rendered prompt). Conversations (running summary
+    included) containing tool results or anything matching LLM_CACHE_EXCLUDE_PATTERNS
+    (booking references, emails, long digit runs) are never cached.
+    """
+
+    def __init__(self):
+        self._exclude = [re.compile(pattern) for pattern in settings.LLM_CACHE_EXCLUDE_PATTERNS]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.LLM_CACHE_ENABLED
+
+    @staticmethod
+    def make_key(request: Dict) -> str:
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return f"{KEY_PREFIX}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+    def is_cacheable(self, messages: List[Dict[str, str]], summary: str = "") -> bool:
+        # The running summary is rendered into the system prompt, so it is checked like a message
+        if summary:
+            if any(line.startswith(SUMMARY_TOOL_RESULT_PREFIX) for line in summary.splitlines()):
+                return False
+            if any(pattern.search(summary) for pattern in self._exclude):
+                return False
+        for message in messages:
+            if message.get("role") == "tool":
+                return False
+            content = message.get("content", "")
+            if any(pattern.search(content) for pattern in self._exclude):
+                return False
+        return True
+
+    async def get(self, key: str, intent: str) -> Optional[str]:
+        try:
+            value = await redis_client.get(key)
+        except Exception as e:
+            LLM_CACHE_RESULTS.labels(intent, "error").inc()
+            logger.warning(f"[LLMCache] Redis read failed: {e}")
+            return None
+
+        LLM_CACHE_RESULTS.labels(intent, "miss" if value is None else "hit").inc()
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def put(self, key: str, text: str) -> None:
+        if len(text) > settings.LLM_CACHE_MAX_RESPONSE_CHARS:
+            return
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, text, ex=settings.LLM_CACHE_TTL_SECONDS)
+                pipe.zadd(INDEX_KEY, {key: time.time()})
+                pipe.zcard(INDEX_KEY)
+                _, _, size = await pipe.execute()
+
+            # Evict the oldest entries once the cache grows past its bound
+            overflow = size - settings.LLM_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                evicted = [member for member, _ in await redis_client.zpopmin(INDEX_KEY, overflow)]
+                if evicted:
+                    await redis_client.delete(*evicted)
+        except Exception as e:
+            logger.warning(f"[LLMCache] Redis write failed: {e}")
+
+    def record_excluded(self, intent: str) -> None:
+        LLM_CACHE_RESULTS.labels(intent, "excluded").inc()
+
+
+llm_cache = LLMResponseCache()
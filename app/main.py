@@ -1,7 +1,10 @@
 from fastapi import FastAPI
-from .router import router
-from .graph import WorkflowFactory
 from .config import settings
+from .router import internal_router, router
+from .graph import workflow_factory
+from .http_client import close_async_client
+from .tool_registry import tool_registry
+from .warmup import startup
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(
@@ -18,11 +21,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the workflow factory and run setup on startup
-workflow_factory = WorkflowFactory(redis_url=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}")
-
+# Load the tool-prompt table, create Redis indices and compile the shared workflow on startup,
+# then warm credentials and connection pools in the background (gated by /ready)
 @app.on_event("startup")
 async def on_startup():
-    workflow_factory.setup()
+    with startup.phase("tool_registry"):
+        tool_registry.load()
+    with startup.phase("workflow"):
+        await workflow_factory.setup()
+    startup.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await startup.stop()
+    await close_async_client()
+    await workflow_factory.close()
 
 app.include_router(router)
+if settings.HISTORY_ENDPOINT_ENABLED:
+    app.include_router(internal_router)
@@ -0,0 +1,105 @@
+import functools
+import logging
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# OpenTelemetry is optional; spans are only emitted when it is installed and enabled
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - depends on deployment image
+    otel_trace = None
+
+_tracer = otel_trace.get_tracer("hopjetair.orchestrator") if (otel_trace and settings.OTEL_ENABLED) else None
+
+NODE_LATENCY = Histogram(
+    "orchestrator_node_latency_seconds", "Graph node latency", ["node"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+NODE_ERRORS = Counter("orchestrator_node_errors_total", "Graph node exceptions", ["node"])
+NODE_IN_FLIGHT = Gauge("orchestrator_node_in_flight", "Graph node executions in progress", ["node"])
+
+TOOL_LATENCY = Histogram(
+    "orchestrator_tool_latency_seconds", "Tool backend call latency", ["tool"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+TOOL_ERRORS = Counter("orchestrator_tool_errors_total", "Failed tool backend calls", ["tool"])
+TOOL_CIRCUIT_OPEN = Gauge(
+    "orchestrator_tool_circuit_open", "1 while a tool endpoint's circuit breaker is open or half-open", ["backend"]
+)
+TOOL_CACHE_RESULTS = Counter(
+    "orchestrator_tool_cache_total", "Tool cache lookups by outcome", ["tool", "cache"]
+)
+
+CLASSIFIER_BATCH_SIZE = Histogram(
+    "orchestrator_classifier_batch_size", "Texts per intent/sentiment classifier call", ["classifier"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+BEDROCK_PROMPT_TOKENS = Histogram(
+    "orchestrator_bedrock_prompt_tokens", "Prompt tokens per Bedrock call", ["intent"],
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+BEDROCK_OUTPUT_TOKENS = Histogram(
+    "orchestrator_bedrock_output_tokens", "Output tokens per Bedrock call", ["intent"],
+    buckets=(16, 32, 64, 128, 256, 512, 1024),
+)
+TOOL_REGISTRY_LOOKUPS = Counter("orchestrator_tool_registry_lookups_total", "Intent -> tool prompt lookups by outcome", ["result"])
+TOOL_REGISTRY_RELOADS = Counter("orchestrator_tool_registry_reloads_total", "INTENT_TOOL_MAP.json loads by outcome", ["result"])
+TOOL_REGISTRY_INTENTS = Gauge("orchestrator_tool_registry_intents", "Intents in the loaded tool table")
+
+BEDROCK_CLIENT_RESULTS = Counter(
+    "orchestrator_bedrock_client_total", "Bedrock client lookups by outcome (hit, refresh, invalidated)", ["result"]
+)
+BEDROCK_CREDENTIALS_EXPIRY = Gauge(
+    "orchestrator_bedrock_credentials_expiry_timestamp_seconds", "Expiry of the assumed-role credentials (0 = managed by botocore)"
+)
+PROMPT_BLOCKS = Counter(
+    "orchestrator_prompt_blocks_total", "Prompt message blocks rendered vs reused from the previous turn", ["result"]
+)
+TURN_ROUTES = Counter("orchestrator_turn_routes_total", "Turns by fast path vs LLM path", ["intent", "route"])
+LLM_CACHE_RESULTS = Counter(
+    "orchestrator_llm_cache_total", "Bedrock response cache lookups by outcome", ["intent", "result"]
+)
+
+ADMISSION_LIMIT = Gauge("orchestrator_admission_limit", "Current concurrency limit", ["limiter"])
+ADMISSION_IN_FLIGHT = Gauge("orchestrator_admission_in_flight", "Admitted calls in progress", ["limiter"])
+ADMISSION_QUEUED = Gauge("orchestrator_admission_queued", "Calls waiting for a slot", ["limiter"])
+ADMISSION_SHED = Counter("orchestrator_admission_shed_total", "Calls rejected because the limiter was saturated", ["limiter"])
+
+STARTUP_PHASE_SECONDS = Gauge("orchestrator_startup_phase_seconds", "Duration of each startup and warm-up phase", ["phase"])
+
+CHECKPOINT_LATENCY = Histogram(
+    "orchestrator_checkpoint_latency_seconds", "Checkpointer read/write latency", ["op"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+def instrument_node(name: str, fn):
+    """Wrap an async graph node with latency, error and in-flight metrics (and an OTel span if enabled)."""
+
+    @functools.wraps(fn)
+    async def wrapper(state, **kwargs):
+        in_flight = NODE_IN_FLIGHT.labels(name)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            if _tracer is None:
+                return await fn(state, **kwargs)
+            with _tracer.start_as_current_span(f"node.{name}"):
+                return await fn(state, **kwargs)
+        except Exception:
+            NODE_ERRORS.labels(name).inc()
+            raise
+        finally:
+            NODE_LATENCY.labels(name).observe(time.perf_counter() - start)
+            in_flight.dec()
+
+    return wrapper
+
+
+def record_bedrock_tokens(intent: str, prompt_tokens: int, output_tokens: int) -> None:
+    BEDROCK_PROMPT_TOKENS.labels(intent or "unknown").observe(prompt_tokens)
+    BEDROCK_OUTPUT_TOKENS.labels(intent or "unknown").observe(output_tokens)
@@ -1,53 +1,99 @@
-import httpx, boto3, json, re
+import asyncio, httpx, json, logging, re, threading
+from concurrent.futures import ThreadPoolExecutor
 from .config import settings
+from .admission import bedrock_limiter, OverloadedError
+from .batching import MicroBatcher
+from .deadline import DeadlineExceeded, budget_timeout, remaining
+from .fast_path import build_fast_tool_call
+from .tool_executor import CircuitOpenError, get_tool_timeout, post_tool
+from .tool_cache import tool_cache
+from .tool_output import normalize_tool_output
+from .history import compact_history, estimate_tokens, load_history_window, record_messages, uses_message_list
+from .metrics import TURN_ROUTES, record_bedrock_tokens
+from .llm_cache import llm_cache
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from .state import GraphState
-from .tool_registry import get_tool_prompt_for_intent
+from .tool_registry import get_tool_prompt_for_intent, tool_registry
 from urllib.parse import urljoin
-from .aws_session import get_bedrock_client_with_sts
-from jinja2 import Template
+from .aws_session import get_bedrock_client_with_sts, invalidate_if_expired
+from botocore.exceptions import ClientError
+from .prompt_builder import prompt_builder
 from typing import Dict, Any
 
+logger = logging.getLogger(__name__)
+
 def is_tool_response(message: str) -> bool:
     return bool(re.search(r"<tool_response>.*?</tool_response>", message.strip(), re.DOTALL))
 
-def render_chat_template(messages):
-    template_str = """{{ bos_token }}{% set loop_messages = messages %}{% for message in loop_messages %}{% if message['role'] == 'system' %}<|im_start|>system\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'user' %}<|im_start|>user\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'assistant' %}<|im_start|>assistant\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'tool' %}<|im_start|>tool\n{{ message['content'] }}<|im_end|>{% endif %}{% endfor %}{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"""
-    template = Template(template_str)
-    rendered_prompt = template.render(messages=messages, bos_token="<|im_start|>", add_generation_prompt=True)
-    return rendered_prompt
+_TOOL_CALL_RE = re.compile(r"<tool_call>(.*?)</tool_call>", re.DOTALL)
 
-def parse_tool_call(state: GraphState) -> GraphState:
+async def parse_tool_call(state: GraphState) -> GraphState:
     last_msg = state["messages"][-1]
     if last_msg.get("role") != "assistant":
-        return {**state, "tool_call": ""}
+        return {**state, "tool_calls": []}
 
     content = last_msg.get("content", "")
     if not isinstance(content, str):
-        return {**state, "tool_call": ""}
+        return {**state, "tool_calls": []}
+
+    tool_calls = [match.strip() for match in _TOOL_CALL_RE.findall(content)]
+    return {**state, "tool_calls": tool_calls}
 
-    match = re.search(r"<tool_call>(.*?)</tool_call>", content, re.DOTALL)
-    if not match:
-        return {**state, "tool_call": ""}
+# The classifiers run as parallel branches, so they return only the key they own;
+# a failed or slow branch falls back instead of failing the whole turn.
+DEFAULT_SENTIMENT = "neutral"
 
-    tool_json_str = match.group(1).strip()
-    return {**state, "tool_call": tool_json_str}
+intent_batcher = MicroBatcher(
+    "intent",
+    single_url=settings.INTENT_API_URL,
+    batch_url=settings.INTENT_BATCH_API_URL,
+    window_ms=settings.CLASSIFIER_BATCH_WINDOW_MS,
+    max_batch_size=settings.CLASSIFIER_MAX_BATCH_SIZE,
+    timeout=settings.INTENT_TIMEOUT_SECONDS,
+)
+sentiment_batcher = MicroBatcher(
+    "sentiment",
+    single_url=settings.SENTIMENT_API_URL,
+    batch_url=settings.SENTIMENT_BATCH_API_URL,
+    window_ms=settings.CLASSIFIER_BATCH_WINDOW_MS,
+    max_batch_size=settings.CLASSIFIER_MAX_BATCH_SIZE,
+    timeout=settings.SENTIMENT_TIMEOUT_SECONDS,
+)
 
-def classify_intent(state: GraphState) -> GraphState:
+async def classify_intent(state: GraphState, config: RunnableConfig) -> GraphState:
     if state.get("intent"):
-        return state
+        return {}
 
     message = state["input"]
     if not is_tool_response(message):
-        r = httpx.post(settings.INTENT_API_URL, json={"text": message})
-        return {**state, "intent": r.json()["intent"]}
-    return state
+        try:
+            timeout = budget_timeout(config, settings.INTENT_TIMEOUT_SECONDS, "intent classification")
+            result = await asyncio.wait_for(intent_batcher.submit(message), timeout)
+            return {"intent": result["intent"], "intent_confidence": float(result.get("confidence") or 0.0)}
+        except Exception as e:
+            logger.warning(f"[Intent] Classification failed, keeping previous intent: {e}")
+    return {}
 
-def classify_sentiment(state: GraphState) -> GraphState:
+async def classify_sentiment(state: GraphState, config: RunnableConfig) -> GraphState:
     message = state["input"]
     if not is_tool_response(message):
-        r = httpx.post(settings.SENTIMENT_API_URL, json={"text": message})
-        return {**state, "sentiment": r.json()["sentiment"]}
-    return state
+        # Sentiment runs alongside intent and only tunes the tone of the reply, so it may use the
+        # budget except for what Bedrock needs after the join; with less than that it is skipped
+        timeout = settings.SENTIMENT_TIMEOUT_SECONDS
+        left = remaining(config)
+        if left is not None:
+            timeout = min(timeout, left - settings.BEDROCK_MIN_BUDGET_SECONDS)
+            if timeout <= 0:
+                logger.info(f"[Sentiment] Skipped, {left:.1f}s left in the turn budget")
+                return {"sentiment": DEFAULT_SENTIMENT}
+        try:
+            result = await asyncio.wait_for(sentiment_batcher.submit(message), timeout)
+            return {"sentiment": result["sentiment"]}
+        except Exception as e:
+            logger.warning(f"[Sentiment] Classification failed, using '{DEFAULT_SENTIMENT}': {e}")
+            return {"sentiment": DEFAULT_SENTIMENT}
+    return {}
 
 # RAG-based tool names (POST calls using query string)
 RAG_INTENTS = {
@@ -135,61 +181,227 @@ def _args_to_query_string(args: dict) -> str:
     """
     return ", ".join([f"{k}={v}" for k, v in args.items()])
 
-def call_travel_or_rag_api(state: dict) -> dict:
-    if not state.get("tool_call"):
-        return {**state, "tool_output": "No tool_call found."}
-
+async def _run_tool_call(tool_call: str) -> str:
+    name = None
     try:
-        tool = json.loads(state["tool_call"])
+        tool = json.loads(tool_call)
         name = tool.get("name")
         args = tool.get("arguments", {})
 
         # RAG tool calls
         if name in RAG_INTENTS:
-            if name == "query_policy_rag_db":
-                query = args["query"]  # Required field
+            if name == "query_policy_rag_db" or "query" in args:
+                query = args["query"]  # Required for query_policy_rag_db; set by the fast path for the others
             else:
                 query = _args_to_query_string(args)
 
-            r = httpx.post(settings.RAG_API_URL, json={"query": query })
-            return {**state, "tool_output": r.json().get("answer", r.text)}
+            async def fetch_rag():
+                timeout = get_tool_timeout(name, settings.RAG_TIMEOUT_SECONDS)
+                r = await post_tool(name, settings.RAG_API_URL, {"query": query}, timeout, service="rag")
+                return r.json().get("answer", r.text), r.is_success
+
+            output = await tool_cache.get_or_fetch(name, args, fetch_rag)
+            return await normalize_tool_output(name, output)
 
         # Normal POST APIs
         elif name in INTENT_ROUTING_MAP:
             endpoint_path = INTENT_ROUTING_MAP[name]
             full_url = urljoin(settings.NON_AI_API_URL, endpoint_path)
-            r = httpx.post(full_url, json=args)
-            return {**state, "tool_output": r.json().get("data", r.text)}
 
-        return {**state, "tool_output": f"Unknown tool: {name}"}
+            async def fetch_tool():
+                timeout = get_tool_timeout(name, settings.TOOL_TIMEOUT_SECONDS)
+                r = await post_tool(name, full_url, args, timeout)
+                return r.json().get("data", r.text), r.is_success
+
+            output = await tool_cache.get_or_fetch(name, args, fetch_tool)
+            return await normalize_tool_output(name, output)
+
+        return f"Unknown tool: {name}"
+
+    except CircuitOpenError:
+        return f"The {name} service is temporarily unavailable. Please try again later."
+    except OverloadedError:
+        return f"The {name} service is busy. Please try again later."
+    except httpx.HTTPError as e:
+        logger.error(f"[Tools] {name} failed: {e}")
+        return f"The {name} service did not respond. Please try again later."
 
     except Exception as e:
-        return {**state, "tool_output": f"Tool call parsing failed: {str(e)}"}
+        return f"Tool call parsing failed: {str(e)}"
+
+async def _run_tool_call_with_deadline(tool_call: str, semaphore: asyncio.Semaphore, config: RunnableConfig) -> str:
+    # Each call has its own deadline, capped by the turn budget, so one slow backend only degrades its own result
+    async with semaphore:
+        try:
+            timeout = budget_timeout(config, settings.TOOL_CALL_DEADLINE_SECONDS, "tool call")
+            return await asyncio.wait_for(_run_tool_call(tool_call), timeout)
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            logger.error(f"[Tools] Call ran out of time: {tool_call[:200]}")
+            return "The service did not respond in time. Please try again later."
+
+async def call_travel_or_rag_api(state: dict, config: RunnableConfig) -> dict:
+    tool_calls = state.get("tool_calls") or []
+    if not tool_calls:
+        return {**state, "tool_outputs": []}
+
+    limit = settings.TOOL_MAX_CALLS_PER_TURN
+    if len(tool_calls) > limit:
+        logger.warning(f"[Tools] {len(tool_calls)} tool calls in one turn, running the first {limit}")
+
+    semaphore = asyncio.Semaphore(settings.TOOL_MAX_PARALLEL_CALLS)
+    outputs = await asyncio.gather(
+        *(_run_tool_call_with_deadline(tool_call, semaphore, config) for tool_call in tool_calls[:limit])
+    )
+    skipped = ["Skipped: too many tool calls in one turn."] * len(tool_calls[limit:])
+    return {**state, "tool_outputs": [*outputs, *skipped]}
+
+# boto3 is blocking, so Bedrock calls run on a dedicated pool instead of the event loop
+_bedrock_executor = ThreadPoolExecutor(max_workers=settings.BEDROCK_MAX_WORKERS, thread_name_prefix="bedrock")
 
-def call_bedrock_model(state: GraphState) -> GraphState:
+def _bedrock_request(payload: dict) -> dict:
+    return dict(
+        modelId=settings.BEDROCK_MODEL_ID,
+        body=json.dumps(payload),
+        contentType="application/json",
+        trace='ENABLED',
+        guardrailIdentifier='81i8pkxk8w7l',
+        guardrailVersion='1'
+    )
+
+def _invoke_bedrock(payload: dict):
+    """Returns (model_response, (prompt_tokens, output_tokens)) using Bedrock's token-count headers."""
     client = get_bedrock_client_with_sts()
+    try:
+        response = client.invoke_model(**_bedrock_request(payload))
+    except ClientError as e:
+        invalidate_if_expired(client, e)
+        raise
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    usage = (
+        int(headers.get("x-amzn-bedrock-input-token-count", 0)),
+        int(headers.get("x-amzn-bedrock-output-token-count", 0)),
+    )
+    return json.loads(response["body"].read()), usage
+
+def _stream_bedrock(payload: dict, emit, stop: threading.Event):
+    """
+    Read the Bedrock response stream, calling emit(text) per chunk; returns (full text, token usage).
+    Setting `stop` closes the stream early so an abandoned turn stops generating.
+    """
+    client = get_bedrock_client_with_sts()
+    try:
+        response = client.invoke_model_with_response_stream(**_bedrock_request(payload))
+    except ClientError as e:
+        invalidate_if_expired(client, e)
+        raise
+    parts = []
+    usage = (0, 0)
+    for event in response["body"]:
+        if stop.is_set():
+            response["body"].close()
+            break
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        data = json.loads(chunk["bytes"])
+        for output in data.get("outputs", []):
+            text = output.get("text", "")
+            if text:
+                parts.append(text)
+                emit(text)
+        invocation_metrics = data.get("amazon-bedrock-invocationMetrics")
+        if invocation_metrics:
+            usage = (invocation_metrics.get("inputTokenCount", 0), invocation_metrics.get("outputTokenCount", 0))
+    return "".join(parts), usage
+
+async def _stream_bedrock_tokens(payload: dict):
+    # Tokens arrive on a worker thread; hand them to the graph's custom stream via a queue
+    loop = asyncio.get_running_loop()
+    writer = get_stream_writer()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(text: str):
+        loop.call_soon_threadsafe(queue.put_nowait, text)
+
+    stop = threading.Event()
+    future = asyncio.ensure_future(
+        bedrock_limiter.run_in_executor(_bedrock_executor, _stream_bedrock, payload, emit, stop)
+    )
+    future.add_done_callback(lambda _: queue.put_nowait(None))
+
+    try:
+        while (text := await queue.get()) is not None:
+            writer({"type": "token", "content": text})
+        return await future
+    finally:
+        # Cancelled by the deadline or a client disconnect; the Bedrock slot stays taken until
+        # the worker thread notices and closes the stream
+        stop.set()
+        future.cancel()
+
+def _thread_id(config: RunnableConfig) -> str:
+    return (config or {}).get("configurable", {}).get("thread_id", "")
+
+async def manage_history(state: GraphState, config: RunnableConfig) -> GraphState:
+    # Bound the carried-over history before this turn's messages are added
+    if not uses_message_list():
+        messages, summary = compact_history(state.get("messages", []), state.get("summary", ""))
+        return {"messages": messages, "summary": summary}
+
+    offset = state.get("history_offset", 0)
+    window = await load_history_window(_thread_id(config), offset)
+    messages, summary = compact_history(window, state.get("summary", ""))
+    return {"messages": messages, "summary": summary, "history_offset": offset + len(window) - len(messages)}
+
+def _input_message(state: GraphState) -> Dict[str, str]:
     message = state["input"]
+    if is_tool_response(message):
+        return {"role": "tool", "content": message.strip()}
+    intent = state.get("intent", "unknown")
+    sentiment = state.get("sentiment", DEFAULT_SENTIMENT)
+    prefixed_input = f"[intent={intent}][sentiment={sentiment}] {message}"
+    return {"role": "user", "content": prefixed_input}
+
+async def fast_path(state: GraphState, config: RunnableConfig) -> GraphState:
+    """Emit the tool call directly, skipping Bedrock, when the intent and its arguments are unambiguous."""
+    intent = state.get("intent", "unknown")
+    entry = tool_registry.get(intent) if state.get("intent") else None
+    tool_call = None
+    if entry is not None and not is_tool_response(state["input"]):
+        tool_call = build_fast_tool_call(
+            entry.tool, state["input"], intent, state.get("intent_confidence", 0.0), entry.tool["name"] in RAG_INTENTS
+        )
 
+    route = "llm" if tool_call is None else "fast_path"
+    TURN_ROUTES.labels(intent, route).inc()
+    if tool_call is None:
+        return {"route": route}
+
+    messages = state.get("messages", [])
+    input_msg = _input_message(state)
+    assistant_msg = {"role": "assistant", "content": f"<tool_call>{tool_call}</tool_call>\nResponse: Let me check that for you."}
+    messages.extend([input_msg, assistant_msg])
+    await record_messages(_thread_id(config), input_msg, assistant_msg)
+    return {"messages": messages, "route": route}
+
+async def call_bedrock_model(state: GraphState, config: RunnableConfig) -> GraphState:
     # Ensure 'messages' is initialized
     if "messages" not in state:
         state["messages"] = []
 
-    if is_tool_response(message):
-        state["messages"].append({"role": "tool", "content": message.strip()})
-    else:
-        intent = state.get("intent", "unknown")
-        sentiment = state.get("sentiment", "neutral")
-        prefixed_input = f"[intent={intent}][sentiment={sentiment}] {message}"
-        state["messages"].append({"role": "user", "content": prefixed_input})
+    input_msg = _input_message(state)
+    state["messages"].append(input_msg)
 
     system_tool_prompt = get_tool_prompt_for_intent(state["intent"]) if "intent" in state else ""
+    if state.get("summary"):
+        system_tool_prompt = f"{system_tool_prompt or ''}\n\nSummary of the earlier conversation:\n{state['summary']}"
     system_prompt = {
         "role": "system",
         "content": (system_tool_prompt or "")
     }
 
     full_messages = [system_prompt] + state["messages"]
-    rendered_prompt = render_chat_template(full_messages)
+    rendered_prompt = prompt_builder.build(_thread_id(config), full_messages)
 
     payload = {
         "prompt": rendered_prompt,
@@ -198,30 +410,69 @@ def call_bedrock_model(state: GraphState) -> GraphState:
         "stop_sequences": ["<|im_end|>", "<|im_start|>user", "<|user|>"]
     }
 
-    response = client.invoke_model(
-        modelId=settings.BEDROCK_MODEL_ID,
-        body=json.dumps(payload),
-        contentType="application/json",
-        trace='ENABLED',
-        guardrailIdentifier='81i8pkxk8w7l',
-        guardrailVersion='1'
-    )
+    intent = state.get("intent", "unknown")
+    stream_tokens = config.get("configurable", {}).get("stream_tokens")
 
-    model_response = json.loads(response["body"].read())
-    final_response = model_response["outputs"][0]["text"].strip()
+    cache_key = None
+    if llm_cache.enabled:
+        if llm_cache.is_cacheable(state["messages"], state.get("summary", "")):
+            cache_key = llm_cache.make_key(_bedrock_request(payload))
+        else:
+            llm_cache.record_excluded(intent)
+    cached_response = await llm_cache.get(cache_key, intent) if cache_key else None
 
-    state["messages"].append({"role": "assistant", "content": final_response})
+    if cached_response is not None:
+        final_response = cached_response
+        if stream_tokens:
+            get_stream_writer()({"type": "token", "content": final_response})
+    else:
+        # Don't spend Bedrock capacity on an answer that cannot arrive in time
+        left = remaining(config)
+        if left is not None and left < settings.BEDROCK_MIN_BUDGET_SECONDS:
+            raise DeadlineExceeded(f"Only {left:.1f}s left for Bedrock inference")
+
+        # Sheds with OverloadedError when Bedrock is saturated; the router turns that into a 503.
+        # The slot is held until the boto3 call returns, even if this turn stops waiting for it.
+        timeout = budget_timeout(config, None, "Bedrock inference")
+        try:
+            if stream_tokens:
+                final_text, usage = await asyncio.wait_for(_stream_bedrock_tokens(payload), timeout)
+                final_response = final_text.strip()
+            else:
+                model_response, usage = await asyncio.wait_for(
+                    bedrock_limiter.run_in_executor(_bedrock_executor, _invoke_bedrock, payload), timeout
+                )
+                final_response = model_response["outputs"][0]["text"].strip()
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Turn budget ran out during Bedrock inference")
+
+        # Fall back to estimates when Bedrock does not report token counts
+        prompt_tokens, output_tokens = usage
+        record_bedrock_tokens(
+            intent,
+            prompt_tokens or estimate_tokens(rendered_prompt),
+            output_tokens or estimate_tokens(final_response)
+        )
+        if cache_key:
+            await llm_cache.put(cache_key, final_response)
+
+    assistant_msg = {"role": "assistant", "content": final_response}
+    state["messages"].append(assistant_msg)
+    await record_messages(_thread_id(config), input_msg, assistant_msg)
 
     return {**state, "messages": state["messages"]}
 
-def append_tool_result(state: GraphState) -> GraphState:
-    last_msg = state["messages"][-1]
-    if last_msg["role"] == "assistant":
-        content = last_msg.get("content", "")
-        if "<tool_call>" in content and "</tool_call>" in content:
-            tool_msg = {
-                "role": "tool",
-                "content": f"<tool_response>{state['tool_output']}</tool_response>"
-            }
-            state["messages"].append(tool_msg)
+async def append_tool_result(state: GraphState, config: RunnableConfig) -> GraphState:
+    # One <tool_response> per call, in the order the model issued them
+    tool_msgs = [
+        {"role": "tool", "content": f"<tool_response>{output}</tool_response>"}
+        for output in state.get("tool_outputs") or []
+    ]
+    if tool_msgs and state["messages"][-1]["role"] == "assistant":
+        state["messages"].extend(tool_msgs)
+        await record_messages(_thread_id(config), *tool_msgs)
+
+    # The per-thread list already holds every message, so keep them out of the checkpoint
+    if uses_message_list():
+        return {**state, "messages": []}
     return state
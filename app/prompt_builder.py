@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from jinja2 import Template
+from .config import settings
+from .metrics import PROMPT_BLOCKS
+
+CHAT_TEMPLATE = """{{ bos_token }}{% set loop_messages = messages %}{% for message in loop_messages %}{% if message['role'] == 'system' %}<|im_start|>system\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'user' %}<|im_start|>user\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'assistant' %}<|im_start|>assistant\n{{ message['content'] }}<|im_end|>{% elif message['role'] == 'tool' %}<|im_start|>tool\n{{ message['content'] }}<|im_end|>{% endif %}{% endfor %}{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"""
+BOS_TOKEN = "<|im_start|>"
+GENERATION_PROMPT = "<|im_start|>assistant\n"
+
+# Compiled once per process
+_template = Template(CHAT_TEMPLATE)
+
+
+def render_chat_template(messages) -> str:
+    return _template.render(messages=messages, bos_token=BOS_TOKEN, add_generation_prompt=True)
+
+
+def render_message(message: Dict[str, str]) -> str:
+    # The template is a plain concatenation per message, so rendering one message on its
+    # own yields exactly the bytes it contributes to the full prompt
+    return _template.render(messages=[message], bos_token="", add_generation_prompt=False)
+
+
+class PromptBuilder:
+    """
+    Renders the chat prompt incrementally: each thread keeps the rendered block for every
+    message in its last prompt, so a new turn only renders messages it has not seen
+    (the new input, or a system prompt whose summary changed). Output is byte-identical
+    to render_chat_template().
+    """
+
+    def __init__(self, max_threads: int):
+        self.max_threads = max_threads
+        self._lock = threading.Lock()
+        # thread_id -> rendered block by (role, content) for the thread's last prompt
+        self._threads: "OrderedDict[str, Dict[Tuple[str, str], str]]" = OrderedDict()
+
+    def build(self, thread_id: str, messages: List[Dict[str, str]]) -> str:
+        with self._lock:
+            cached = self._threads.get(thread_id, {})
+
+        blocks, by_key = [], {}
+        for message in messages:
+            content = message.get("content")
+            key = (message.get("role"), content) if isinstance(content, str) else None
+            block = cached.get(key) if key else None
+            if block is None:
+                block = render_message(message)
+                PROMPT_BLOCKS.labels("rendered").inc()
+            else:
+                PROMPT_BLOCKS.labels("reused").inc()
+            blocks.append(block)
+            if key:
+                by_key[key] = block
+
+        if thread_id:
+            with self._lock:
+                self._threads[thread_id] = by_key
+                self._threads.move_to_end(thread_id)
+                while len(self._threads) > self.max_threads:
+                    self._threads.popitem(last=False)
+
+        return BOS_TOKEN + "".join(blocks) + GENERATION_PROMPT
+
+
+prompt_builder = PromptBuilder(max_threads=settings.PROMPT_CACHE_MAX_THREADS)
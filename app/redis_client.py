@@ -0,0 +1,5 @@
+import redis.asyncio as aioredis
+from .config import settings
+
+# One async Redis connection pool per process, shared by the checkpointer and caches
+redis_client = aioredis.Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}")
@@ -1,18 +1,27 @@
 # app/router.py
 
 from fastapi import APIRouter, Request, Depends
-from .graph import WorkflowFactory
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.background import BackgroundTask
+from .admission import OverloadedError, turn_limiter
 from .config import settings
+from .deadline import DeadlineExceeded, deadline_after
+from .graph import ainvoke_turn, astream_turn, workflow_factory
+from .history import load_full_history, turn_messages
+from .tool_output import load_full_output
+from .warmup import startup
+import asyncio
+import json
 import logging
 
 router = APIRouter()
+# Unauthenticated operator endpoints; only mounted when HISTORY_ENDPOINT_ENABLED is set
+internal_router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize the workflow factory instance
-workflow_factory = WorkflowFactory(redis_url=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}")
-
-# Dependency to get compiled workflow
-def get_compiled_workflow():
+# Dependency to get the process-wide compiled workflow; async so FastAPI does not run it in the threadpool
+async def get_compiled_workflow():
     return workflow_factory.get_workflow()
 
 @router.get("/health")
@@ -21,47 +30,336 @@ async def health_check():
     return {"status": "ok", "service": "new langgraph api"}
 
 
+@router.get("/ready")
+async def readiness_check():
+    # Readiness for scale-out: 503 until the startup warm-up has finished, with per-phase timings
+    report = startup.report()
+    return JSONResponse(report, status_code=200 if startup.ready else 503)
+
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus scrape endpoint for node, tool, token and checkpoint metrics
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@internal_router.get("/history/{session_id}")
+async def history_endpoint(session_id: str):
+    # Full audit transcript; /chat only returns the bounded working window
+    try:
+        return {"messages": await load_full_history(session_id)}
+    except Exception as e:
+        logger.error(f"[History Error] {str(e)}", exc_info=True)
+        return {"error": "Unable to load conversation history at this moment."}
+
+
+@router.get("/tool-output/{key}")
+async def tool_output_endpoint(key: str):
+    # Full payload of a tool output that was truncated in the conversation
+    try:
+        payload = await load_full_output(key)
+    except Exception as e:
+        logger.error(f"[ToolOutput Error] {str(e)}", exc_info=True)
+        return {"error": "Unable to load the tool output at this moment."}
+    if payload is None:
+        return JSONResponse({"error": "Tool output not found or expired."}, status_code=404)
+    return {"key": key, "output": payload}
+
+
+def parse_chat_request(data: dict):
+    """Validate a /chat body; returns (content, role, session_id, deadline) or an error response dict."""
+    # Get last message (user or tool)
+    last_message = data.get("message")
+    if not last_message or not isinstance(last_message, dict):
+        return {"error": "Missing or invalid 'message' object."}
+
+    # Validate content
+    content = last_message.get("content", "")
+    if not isinstance(content, str):
+        return {"error": "Message content must be a string."}
+    content = content.strip()
+    if not content:
+        return {"error": "Message content is empty."}
+
+    # Validate role
+    role = last_message.get("role", "")
+    role = role.strip() if isinstance(role, str) else ""
+    if role not in ["user", "tool"]:
+        return {"error": "Invalid message role. Must be 'user' or 'tool'."}
+
+    # Get or default the session ID
+    session_id = data.get("session_id", "anonymous-session")
+
+    # Optional end-to-end budget for the turn, in milliseconds from now
+    deadline_ms = data.get("deadline_ms")
+    if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or deadline_ms <= 0):
+        return {"error": "Invalid 'deadline_ms'. Must be a positive number of milliseconds."}
+
+    return content, role, session_id, deadline_after(deadline_ms)
+
+
+def turn_input(content: str, role: str) -> dict:
+    # intent_confidence is reset every turn, so only an intent classified on this turn can take the fast path
+    return {"input": content, "role": role, "intent_confidence": 0.0}
+
+
+def build_run_config(session_id: str, **configurable) -> dict:
+    return {
+        "configurable": {
+            "session_id": session_id,  # Optional: for your tracking
+            "thread_id": session_id,   # Required for RedisSaver
+            **configurable
+        }
+    }
+
+
+CHAT_ERROR_MESSAGE = "Sorry for the inconvenience, we are unable to process the request at this moment. Please try again later."
+OVERLOADED_MESSAGE = "We are receiving more requests than we can handle right now. Please try again shortly."
+DEADLINE_MESSAGE = "Sorry, we could not complete the request in time. Please try again."
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def run_until_disconnected(request: Request, coro):
+    """
+    Await `coro` in its own task, cancelling it if the client disconnects first, so an
+    abandoned turn stops calling Bedrock and the backends. Raises ClientDisconnected then.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("[Chat] Client disconnected, cancelling the turn")
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        task.cancel()
+
+
+def overloaded_response(e: OverloadedError) -> JSONResponse:
+    # Shed fast with a hint, rather than letting the request wait for the ALB timeout
+    logger.warning(f"[Admission] Shedding request: {e}")
+    return JSONResponse(
+        {"error": OVERLOADED_MESSAGE, "retry_after": e.retry_after},
+        status_code=503,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+async def run_chat_turn(workflow, content: str, role: str, session_id: str, deadline: float) -> dict:
+    # Invoke workflow — LangGraph RedisSaver will restore message history
+    result = await ainvoke_turn(
+        workflow,
+        input=turn_input(content, role),
+        config=build_run_config(session_id, deadline=deadline)
+    )
+    messages = await turn_messages(session_id, result.get("messages", []), result.get("history_offset", 0))
+    # "fast_path" when the tool call was built without Bedrock, else "llm"
+    return {"messages": messages, "route": result.get("route", "llm")}
+
+
 @router.post("/chat")
 async def chat_endpoint(request: Request, workflow=Depends(get_compiled_workflow)):
     try:
-        data = await request.json()
+        parsed = parse_chat_request(await request.json())
+        if isinstance(parsed, dict):
+            return parsed
+        content, role, session_id, deadline = parsed
 
-        # Get last message (user or tool)
-        last_message = data.get("message")
-        if not last_message or not isinstance(last_message, dict):
-            return {"error": "Missing or invalid 'message' object."}
-
-        # Validate content
-        content = last_message.get("content", "").strip()
-        if not content:
-            return {"error": "Message content is empty."}
-
-        # Validate role
-        role = last_message.get("role", "").strip()
-        if role not in ["user", "tool"]:
-            return {"error": "Invalid message role. Must be 'user' or 'tool'."}
-
-        # Get or default the session ID
-        session_id = data.get("session_id", "anonymous-session")
-
-        # Invoke workflow — LangGraph RedisSaver will restore message history
-        result = workflow.invoke(
-            input={
-                "input": content,
-                "role": role
-            },
-            config={
-                "configurable": {
-                    "session_id": session_id,  # Optional: for your tracking
-                    "thread_id": session_id    # Required for RedisSaver
-                }
-            }
-        )
-
-        return {"messages": result["messages"]}
+        async with turn_limiter.slot():
+            return await run_until_disconnected(
+                request, run_chat_turn(workflow, content, role, session_id, deadline)
+            )
 
+    except OverloadedError as e:
+        return overloaded_response(e)
+    except DeadlineExceeded as e:
+        logger.warning(f"[Chat] {session_id}: {e}")
+        return JSONResponse({"error": DEADLINE_MESSAGE}, status_code=504)
+    except ClientDisconnected:
+        # Nobody is listening; 499 only shows up in access logs
+        return Response(status_code=499)
     except Exception as e:
         logger.error(f"[LangGraph Error] {str(e)}", exc_info=True)
         return {
-            "error": "Sorry for the inconvenience, we are unable to process the request at this moment. Please try again later."
+            "error": CHAT_ERROR_MESSAGE
         }
+
+
+def _ndjson(frame: dict) -> str:
+    return json.dumps(frame, default=str) + "\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: Request, workflow=Depends(get_compiled_workflow)):
+    """
+    Same contract as /chat, streamed as NDJSON frames:
+    {"type": "token"} per Bedrock chunk, then "tool_call" / "tool_result" per tool call (with its index),
+    and a final "done" frame with the messages and route (or an "error" frame).
+    """
+    try:
+        parsed = parse_chat_request(await request.json())
+    except Exception:
+        parsed = {"error": "Invalid JSON body."}
+    if isinstance(parsed, dict):
+        return parsed
+    content, role, session_id, deadline = parsed
+
+    try:
+        await turn_limiter.acquire()
+    except OverloadedError as e:
+        return overloaded_response(e)
+
+    released = False
+
+    def release_turn():
+        # Runs from the generator, or as the response's background task if the client went away first
+        nonlocal released
+        if not released:
+            released = True
+            turn_limiter.release()
+
+    async def frames():
+        messages, history_offset, route = [], 0, "llm"
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            # The run gets its own task so a disconnect cancels it even while no frame is being sent
+            try:
+                async for item in astream_turn(
+                    workflow,
+                    turn_input(content, role),
+                    config=build_run_config(session_id, stream_tokens=True, deadline=deadline),
+                    stream_mode=["custom", "updates"]
+                ):
+                    chunks.put_nowait(item)
+            finally:
+                chunks.put_nowait(None)
+
+        run = asyncio.ensure_future(run_until_disconnected(request, produce()))
+        try:
+            # The final checkpoint is written when the run exits, so the state is persisted by the time "done" is sent
+            while (item := await chunks.get()) is not None:
+                mode, chunk = item
+                if mode == "custom":
+                    yield _ndjson(chunk)
+                    continue
+
+                for node, update in chunk.items():
+                    update = update or {}
+                    if "messages" in update:
+                        messages = update["messages"]
+                    if "history_offset" in update:
+                        history_offset = update["history_offset"]
+                    if "route" in update:
+                        route = update["route"]
+                    if node == "parse_tool_call":
+                        for index, tool_call in enumerate(update.get("tool_calls") or []):
+                            yield _ndjson({"type": "tool_call", "index": index, "content": tool_call})
+                    elif node == "call_tool":
+                        for index, tool_output in enumerate(update.get("tool_outputs") or []):
+                            yield _ndjson({"type": "tool_result", "index": index, "content": tool_output})
+            await run
+
+            messages = await turn_messages(session_id, messages, history_offset)
+            yield _ndjson({"type": "done", "messages": messages, "route": route})
+
+        except ClientDisconnected:
+            return
+        except OverloadedError as e:
+            yield _ndjson({"type": "error", "error": OVERLOADED_MESSAGE, "retry_after": e.retry_after})
+        except DeadlineExceeded as e:
+            logger.warning(f"[Chat] {session_id}: {e}")
+            yield _ndjson({"type": "error", "error": DEADLINE_MESSAGE})
+        except Exception as e:
+            logger.error(f"[LangGraph Error] {str(e)}", exc_info=True)
+            yield _ndjson({"type": "error", "error": CHAT_ERROR_MESSAGE})
+        finally:
+            run.cancel()
+            release_turn()
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson", background=BackgroundTask(release_turn))
+
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(request: Request):
+    """
+    Bulk and replay traffic: {"items": [<chat body>, ...], "parallelism": n}.
+    Sessions run concurrently (up to `parallelism` turns at once) while turns of the same
+    session run in submission order. Results are streamed as NDJSON as each item completes:
+    {"type": "result" | "error", "index": i, "session_id": ...}, then a final
+    {"type": "done"} frame with counts.
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        return {"error": "Invalid JSON body."}
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return {"error": "Missing or empty 'items' list."}
+    if len(items) > settings.CHAT_BATCH_MAX_ITEMS:
+        return {"error": f"Too many items; the limit is {settings.CHAT_BATCH_MAX_ITEMS}."}
+    parallelism = data.get("parallelism", settings.CHAT_BATCH_PARALLELISM)
+    if isinstance(parallelism, bool) or not isinstance(parallelism, int) or parallelism <= 0:
+        return {"error": "Invalid 'parallelism'. Must be a positive integer."}
+
+    # Group item indexes by session, keeping submission order within each session
+    sessions = {}
+    for index, item in enumerate(items):
+        session_id = item.get("session_id", "anonymous-session") if isinstance(item, dict) else None
+        sessions.setdefault(str(session_id), []).append(index)
+
+    semaphore = asyncio.Semaphore(min(parallelism, settings.CHAT_BATCH_MAX_PARALLELISM))
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_item(index: int) -> dict:
+        # Always returns a frame: frames() expects exactly one per item
+        item = items[index]
+        session_id = item.get("session_id") if isinstance(item, dict) else None
+        frame = {"index": index, "session_id": session_id}
+        try:
+            # Parsed when the item starts, so its deadline does not tick while it waits its turn
+            parsed = parse_chat_request(item) if isinstance(item, dict) else {"error": "Item must be an object."}
+            if isinstance(parsed, dict):
+                return {"type": "error", **frame, **parsed}
+            content, role, session_id, deadline = parsed
+            frame["session_id"] = session_id
+            async with turn_limiter.slot():
+                response = await run_chat_turn(await get_compiled_workflow(), content, role, session_id, deadline)
+            return {"type": "result", **frame, **response}
+        except OverloadedError as e:
+            return {"type": "error", **frame, "error": OVERLOADED_MESSAGE, "retry_after": e.retry_after}
+        except DeadlineExceeded:
+            return {"type": "error", **frame, "error": DEADLINE_MESSAGE}
+        except Exception as e:
+            logger.error(f"[Batch] Item {index} ({session_id}) failed: {e}", exc_info=True)
+            return {"type": "error", **frame, "error": CHAT_ERROR_MESSAGE}
+
+    async def run_session(indexes: list) -> None:
+        for index in indexes:
+            async with semaphore:
+                results.put_nowait(await run_item(index))
+
+    async def frames():
+        tasks = [asyncio.ensure_future(run_session(indexes)) for indexes in sessions.values()]
+        succeeded = failed = 0
+        try:
+            for _ in range(len(items)):
+                frame = await results.get()
+                if frame["type"] == "result":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield _ndjson(frame)
+            yield _ndjson({"type": "done", "succeeded": succeeded, "failed": failed})
+        finally:
+            # Stops the remaining sessions if the client goes away mid-batch
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
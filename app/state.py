@@ -3,7 +3,11 @@ from typing import List, Dict, TypedDict
 class GraphState(TypedDict):
     input: str
     intent: str
+    intent_confidence: float  # Classifier confidence for `intent` this turn; 0.0 when it was not classified
     sentiment: str
-    messages: List[Dict[str, str]]
-    tool_call: str  # Raw XML or JSON extracted
-    tool_output: str
+    messages: List[Dict[str, str]]  # Bounded working window; full transcript is in app.history
+    summary: str  # Compact summary of turns dropped from the window
+    history_offset: int  # Start of the window in the per-thread message list (MESSAGE_STORE=redis_list)
+    tool_calls: List[str]  # Raw JSON of every <tool_call> in the last assistant message, in order
+    tool_outputs: List[str]  # One result per entry in tool_calls
+    route: str  # "fast_path" when the tool call was built without Bedrock, else "llm"
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from .config import settings
+from .redis_client import redis_client
+from .metrics import TOOL_CACHE_RESULTS
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+
+def canonical_args(args: Dict[str, Any]) -> str:
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResponseCache:
+    """
+    Two-tier TTL cache for read-only tool and RAG responses: an in-process LRU in front of
+    a shared Redis tier. Concurrent misses for the same key share one backend call.
+    Only tools listed in TOOL_CACHE_TTLS are cached, each with its own TTL in seconds.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def ttl_for(self, name: str) -> int:
+        if not settings.TOOL_CACHE_ENABLED:
+            return 0
+        return settings.TOOL_CACHE_TTLS.get(name, 0)
+
+    @staticmethod
+    def make_key(name: str, args: Dict[str, Any]) -> str:
+        digest = hashlib.sha256(canonical_args(args).encode("utf-8")).hexdigest()
+        return f"toolcache:{name}:{digest}"
+
+    def _local_get(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return _MISS
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._local[key]
+            return _MISS
+        self._local.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: Any, expires_at: float) -> None:
+        self._local[key] = (expires_at, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Tuple[Any, bool]]],
+    ) -> Any:
+        """`fetch` returns (tool_output, cacheable); uncacheable results are passed through."""
+        ttl = self.ttl_for(name)
+        if not ttl:
+            TOOL_CACHE_RESULTS.labels(name, "bypass").inc()
+            value, _ = await fetch()
+            return value
+
+        key = self.make_key(name, args)
+        value = self._local_get(key)
+        if value is not _MISS:
+            TOOL_CACHE_RESULTS.labels(name, "local_hit").inc()
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            TOOL_CACHE_RESULTS.labels(name, "coalesced").inc()
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._load(key, name, ttl, fetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, name: str, ttl: int, fetch) -> Any:
+        try:
+            raw = await redis_client.get(key)
+            if raw is not None:
+                cached = json.loads(raw)
+                self._local_set(key, cached["value"], cached["expires_at"])
+                TOOL_CACHE_RESULTS.labels(name, "redis_hit").inc()
+                return cached["value"]
+        except Exception as e:
+            logger.warning(f"[ToolCache] Redis read failed for {name}: {e}")
+
+        TOOL_CACHE_RESULTS.labels(name, "miss").inc()
+        value, cacheable = await fetch()
+        if not cacheable:
+            return value
+
+        expires_at = time.time() + ttl
+        self._local_set(key, value, expires_at)
+        try:
+            await redis_client.set(key, json.dumps({"value": value, "expires_at": expires_at}), ex=ttl)
+        except Exception as e:
+            logger.warning(f"[ToolCache] Redis write failed for {name}: {e}")
+        return value
+
+
+tool_cache = ToolResponseCache(max_entries=settings.TOOL_CACHE_MAX_ENTRIES)
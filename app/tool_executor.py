@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict
+import httpx
+from .admission import get_backend_limiter
+from .config import settings
+from .http_client import get_async_client
+from .metrics import TOOL_CIRCUIT_OPEN, TOOL_ERRORS, TOOL_LATENCY
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single trial call through after a cool-down."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        TOOL_CIRCUIT_OPEN.labels(name).set(0)
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            TOOL_CIRCUIT_OPEN.labels(self.name).set(0)
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        # The trial ended without telling us anything about the backend (cancelled, shed)
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"[Tools] Circuit opened for {self.name}")
+                TOOL_CIRCUIT_OPEN.labels(self.name).set(1)
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    breaker = _breakers.get(backend)
+    if breaker is None:
+        breaker = _breakers[backend] = CircuitBreaker(
+            backend,
+            failure_threshold=settings.TOOL_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.TOOL_CIRCUIT_RESET_SECONDS,
+        )
+    return breaker
+
+
+def is_idempotent_tool(name: str) -> bool:
+    # Only read-only tools are safe to send twice
+    return name in settings.TOOL_RETRYABLE
+
+
+def get_tool_timeout(name: str, default: float) -> float:
+    return settings.TOOL_TIMEOUT_OVERRIDES.get(name, default)
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, base * 2^attempt], capped
+    ceiling = min(settings.TOOL_RETRY_MAX_DELAY_SECONDS, settings.TOOL_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+async def post_tool(name: str, url: str, payload: Dict[str, Any], timeout: float, service: str = "tools") -> httpx.Response:
+    """
+    POST to a tool backend through the shared pool, guarded by that endpoint's circuit breaker.
+    Transport errors and 5xx responses are retried with jittered backoff, for TOOL_RETRYABLE tools only.
+    Each attempt takes a slot from the service's limiter and may raise OverloadedError.
+    """
+    breaker = get_breaker(url)
+    limiter = get_backend_limiter(service)
+    attempts = 1 + (settings.TOOL_MAX_RETRIES if is_idempotent_tool(name) else 0)
+
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {name}")
+
+        start = time.perf_counter()
+        try:
+            async with limiter.slot():
+                r = await get_async_client().post(url, json=payload, timeout=timeout)
+                TOOL_LATENCY.labels(name).observe(time.perf_counter() - start)
+                if r.status_code >= 500:
+                    r.raise_for_status()
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            TOOL_ERRORS.labels(name).inc()
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                raise
+            logger.warning(f"[Tools] {name} attempt {attempt + 1} failed, retrying: {e}")
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        except BaseException:
+            # Cancelled (deadline, disconnect) or shed by the limiter: no verdict on the backend,
+            # but a half-open trial must not stay claimed or the breaker never closes again
+            breaker.release_trial()
+            raise
+        breaker.record_success()
+        return r
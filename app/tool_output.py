@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+from typing import Any, Optional, Sequence
+from .config import settings
+from .redis_client import redis_client
+from .tool_registry import tool_registry
+
+logger = logging.getLogger(__name__)
+
+# Full payloads of tool outputs that were cut down for the conversation
+KEY_PREFIX = "tool_output"
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project_fields(value: Any, fields: Optional[Sequence[str]]) -> Any:
+    """Keep only `fields` of a response object (or of each object in a list)."""
+    if not fields:
+        return value
+    if isinstance(value, dict):
+        # An object with none of the fields (e.g. an error body) is kept whole rather than emptied
+        return {key: value[key] for key in fields if key in value} or value
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    return value
+
+
+async def store_full_output(payload: str) -> Optional[str]:
+    # Content-addressed, so identical large responses share one key
+    key = f"{KEY_PREFIX}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]}"
+    try:
+        await redis_client.set(key, payload, ex=settings.TOOL_OUTPUT_STORE_TTL_SECONDS)
+        return key
+    except Exception as e:
+        logger.warning(f"[ToolOutput] Could not store full output: {e}")
+        return None
+
+
+async def load_full_output(key: str) -> Optional[str]:
+    if not key.startswith(f"{KEY_PREFIX}:"):
+        return None
+    value = await redis_client.get(key)
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+async def normalize_tool_output(name: str, output: Any) -> str:
+    """
+    Turn a raw tool result into the text stored in the conversation: compact JSON, projected
+    to the tool's `output_fields` from INTENT_TOOL_MAP if it lists any (opt-in, per tool), and
+    capped at TOOL_OUTPUT_MAX_CHARS.
+    When the cap applies, the full (unprojected) payload is stored in Redis and the marker
+    names its key.
+    """
+    if isinstance(output, str):
+        text, full = output, output
+    else:
+        tool = tool_registry.get_tool(name)
+        text = compact_json(project_fields(output, tool.get("output_fields") if tool else None))
+        full = compact_json(output)
+
+    max_chars = settings.TOOL_OUTPUT_MAX_CHARS
+    if len(text) <= max_chars:
+        return text
+
+    dropped = len(text) - max_chars
+    key = await store_full_output(full)
+    reference = f"; full output stored as {key}" if key else ""
+    return f"{text[:max_chars]}…[truncated {dropped} chars{reference}]"
@@ -1,20 +1,28 @@
 import os
 import json
+import hashlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+from .config import settings
+from .metrics import TOOL_REGISTRY_INTENTS, TOOL_REGISTRY_LOOKUPS, TOOL_REGISTRY_RELOADS
 
-def get_tool_prompt_for_intent(intent: str) -> str:
-    # Get absolute path to project root (/app)
-    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    json_path = os.path.join(root_dir, "INTENT_TOOL_MAP.json")  # resolves to /app/INTENT_TOOL_MAP.json
+logger = logging.getLogger(__name__)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        intent_tool_map = json.load(f)
+# Get absolute path to project root (/app)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+INTENT_TOOL_MAP_PATH = os.path.join(ROOT_DIR, "INTENT_TOOL_MAP.json")  # resolves to /app/INTENT_TOOL_MAP.json
 
-    tools = intent_tool_map.get(intent, [])
-    if not tools:
-        return f"No tool configuration found for intent '{intent}'."
 
-    tool = tools[0]
+class ToolPrompt(NamedTuple):
+    tool: Mapping
+    system_prompt: str
+    content_hash: str
+
 
+def build_system_prompt(tool: dict) -> str:
     tool_entry = (
         '{\n'
         '  "type": "function",\n'
@@ -39,4 +47,97 @@ def get_tool_prompt_for_intent(intent: str) -> str:
         "</tool_call>"
     )
 
-    return system_prompt
\ No newline at end of file
+    return system_prompt
+
+
+def _validate_intent_tool_map(intent_tool_map) -> None:
+    if not isinstance(intent_tool_map, dict):
+        raise ValueError("INTENT_TOOL_MAP.json must be a JSON object keyed by intent")
+
+    for intent, tools in intent_tool_map.items():
+        if not isinstance(tools, list) or not tools:
+            raise ValueError(f"Intent '{intent}' must map to a non-empty list of tools")
+        for tool in tools:
+            if not isinstance(tool, dict):
+                raise ValueError(f"Intent '{intent}' has a tool that is not an object")
+            for key, expected in (("name", str), ("description", str), ("parameters", dict)):
+                if not isinstance(tool.get(key), expected):
+                    raise ValueError(f"Intent '{intent}' tool is missing a valid '{key}'")
+            # Optional: top-level response fields to keep in the conversation (see app.tool_output)
+            output_fields = tool.get("output_fields")
+            if output_fields is not None and not (
+                isinstance(output_fields, list) and all(isinstance(field, str) for field in output_fields)
+            ):
+                raise ValueError(f"Intent '{intent}' tool has an invalid 'output_fields' list")
+
+
+class ToolRegistry:
+    """Intent -> system prompt table, loaded once and reloaded when the JSON file changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._prompts: Mapping[str, ToolPrompt] = MappingProxyType({})
+        self._tools_by_name: Mapping[str, Mapping] = MappingProxyType({})
+        self._mtime: Optional[int] = None
+        self._last_check = 0.0
+
+    def load(self) -> None:
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                intent_tool_map = json.load(f)
+
+            _validate_intent_tool_map(intent_tool_map)
+
+            prompts = {}
+            for intent, tools in intent_tool_map.items():
+                tool = tools[0]
+                system_prompt = build_system_prompt(tool)
+                content_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+                prompts[intent] = ToolPrompt(MappingProxyType(tool), system_prompt, content_hash)
+
+            self._prompts = MappingProxyType(prompts)
+            self._tools_by_name = MappingProxyType({entry.tool["name"]: entry.tool for entry in prompts.values()})
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+            TOOL_REGISTRY_RELOADS.labels("ok").inc()
+            TOOL_REGISTRY_INTENTS.set(len(prompts))
+            logger.info(f"[ToolRegistry] Loaded {len(prompts)} intents from {self.path}")
+
+    def reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._last_check < settings.TOOL_REGISTRY_RELOAD_CHECK_SECONDS:
+            return
+        self._last_check = now
+
+        try:
+            if self._mtime is not None and os.stat(self.path).st_mtime_ns == self._mtime:
+                return
+            self.load()
+        except (OSError, ValueError) as e:
+            # Keep serving the last good table if the new file is unreadable or invalid
+            TOOL_REGISTRY_RELOADS.labels("failed").inc()
+            if self._mtime is None:
+                raise
+            logger.error(f"[ToolRegistry] Reload failed, keeping previous table: {e}")
+
+    def get(self, intent: str) -> Optional[ToolPrompt]:
+        self.reload_if_changed()
+        entry = self._prompts.get(intent)
+        TOOL_REGISTRY_LOOKUPS.labels("miss" if entry is None else "hit").inc()
+        return entry
+
+    def get_tool(self, name: str) -> Optional[Mapping]:
+        self.reload_if_changed()
+        return self._tools_by_name.get(name)
+
+
+tool_registry = ToolRegistry(INTENT_TOOL_MAP_PATH)
+
+
+def get_tool_prompt_for_intent(intent: str) -> str:
+    entry = tool_registry.get(intent)
+    if entry is None:
+        return f"No tool configuration found for intent '{intent}'."
+    return entry.system_prompt
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+from .aws_session import get_bedrock_client_with_sts
+from .config import settings
+from .http_client import get_async_client
+from .metrics import STARTUP_PHASE_SECONDS
+from .nodes import INTENT_ROUTING_MAP
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def backend_origins() -> List[str]:
+    """scheme://host[:port] of every configured backend, so each gets pooled connections up front."""
+    urls = [
+        settings.INTENT_API_URL,
+        settings.SENTIMENT_API_URL,
+        settings.INTENT_BATCH_API_URL,
+        settings.SENTIMENT_BATCH_API_URL,
+        settings.RAG_API_URL,
+        *(urljoin(settings.NON_AI_API_URL, path) for path in INTENT_ROUTING_MAP.values()),
+    ]
+    origins = []
+    for url in urls:
+        parts = urlsplit(url or "")
+        if parts.scheme in ("http", "https") and parts.netloc:
+            origins.append(f"{parts.scheme}://{parts.netloc}")
+    return list(dict.fromkeys(origins))
+
+
+class StartupWarmup:
+    """
+    Times each startup phase and, once the app is serving, warms the remaining cold paths
+    in the background: credentials and the Bedrock client, the Redis pool and the HTTP pool
+    to every backend. /ready reports 503 until this finishes; a failed phase is logged and
+    reported but does not hold readiness back.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(elapsed * 1000, 1)
+            STARTUP_PHASE_SECONDS.labels(name).set(elapsed)
+
+    async def _optional_phase(self, name: str, coro) -> None:
+        try:
+            with self.phase(name):
+                await coro
+        except Exception as e:
+            logger.warning(f"[Startup] Warm-up phase {name} failed: {e}")
+
+    async def _warm_bedrock(self) -> None:
+        # Credential resolution (and STS assume-role) plus client construction are blocking
+        await asyncio.get_running_loop().run_in_executor(None, get_bedrock_client_with_sts)
+
+    async def _warm_redis(self) -> None:
+        await asyncio.gather(*(redis_client.ping() for _ in range(settings.WARMUP_REDIS_CONNECTIONS)))
+
+    async def _warm_http(self) -> None:
+        client = get_async_client()
+
+        async def touch(origin: str) -> None:
+            # Any response means the connection (and TLS session) is now pooled
+            try:
+                await client.head(origin, timeout=settings.WARMUP_HTTP_TIMEOUT_SECONDS)
+            except Exception as e:
+                logger.warning(f"[Startup] Could not reach {origin}: {e}")
+
+        origins = backend_origins()
+        await asyncio.gather(*(
+            touch(origin) for origin in origins for _ in range(settings.WARMUP_HTTP_CONNECTIONS_PER_BACKEND)
+        ))
+
+    async def run(self) -> None:
+        start = time.perf_counter()
+        await asyncio.gather(
+            self._optional_phase("bedrock_client", self._warm_bedrock()),
+            self._optional_phase("redis_pool", self._warm_redis()),
+            self._optional_phase("http_pool", self._warm_http()),
+        )
+        self.timings["warmup_total"] = round((time.perf_counter() - start) * 1000, 1)
+        self.ready = True
+        logger.info(f"[Startup] Ready; phase timings (ms): {self.timings}")
+
+    def start(self) -> None:
+        if not settings.WARMUP_ENABLED:
+            self.ready = True
+            return
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def report(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "startup_ms": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+
+startup = StartupWarmup()
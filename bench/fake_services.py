@@ -0,0 +1,140 @@
+"""
+Local stand-ins for every backend the orchestrator calls, served from one FastAPI app:
+
+    POST /intent, /intent/batch         intent classifier (intent looked up from the corpus)
+    POST /sentiment, /sentiment/batch   sentiment classifier
+    POST /rag                           RAG answers
+    POST /tools/{name}                  NON_AI_API_URL tool backends
+    POST /model/{model_id}/invoke       Bedrock runtime stub returning canned <tool_call> outputs
+
+Latencies are configured through FAKE_*_LATENCY_MS environment variables.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CORPUS_PATH = os.environ.get("FAKE_CORPUS", os.path.join(os.path.dirname(__file__), "sessions.jsonl"))
+
+LATENCY_MS = {
+    "intent": float(os.environ.get("FAKE_INTENT_LATENCY_MS", "15")),
+    "sentiment": float(os.environ.get("FAKE_SENTIMENT_LATENCY_MS", "10")),
+    "rag": float(os.environ.get("FAKE_RAG_LATENCY_MS", "120")),
+    "tool": float(os.environ.get("FAKE_TOOL_LATENCY_MS", "40")),
+    "bedrock": float(os.environ.get("FAKE_BEDROCK_LATENCY_MS", "600")),
+}
+JITTER = float(os.environ.get("FAKE_LATENCY_JITTER", "0.2"))
+
+_INTENT_RE = re.compile(r"\[intent=([^\]]+)\]")
+
+with open(os.path.join(ROOT_DIR, "INTENT_TOOL_MAP.json"), encoding="utf-8") as f:
+    INTENT_TOOL_MAP = json.load(f)
+
+
+def _load_corpus_intents(path: str) -> dict:
+    intents = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                for turn in json.loads(line)["turns"]:
+                    intents[turn["text"]] = turn.get("intent", "query_policy_rag_db")
+    return intents
+
+
+TEXT_TO_INTENT = _load_corpus_intents(CORPUS_PATH)
+
+app = FastAPI(title="Orchestrator benchmark stand-ins")
+
+
+async def _delay(kind: str) -> None:
+    base = LATENCY_MS[kind] / 1000.0
+    await asyncio.sleep(max(0.0, base * random.uniform(1 - JITTER, 1 + JITTER)))
+
+
+def _classify_intent(text: str) -> dict:
+    return {"intent": TEXT_TO_INTENT.get(text, "query_policy_rag_db"), "confidence": 0.97}
+
+
+def _classify_sentiment(text: str) -> dict:
+    return {"sentiment": "Negative" if "!" in text else "Neutral"}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.post("/intent")
+async def intent(request: Request):
+    body = await request.json()
+    await _delay("intent")
+    return _classify_intent(body["text"])
+
+
+@app.post("/intent/batch")
+async def intent_batch(request: Request):
+    body = await request.json()
+    await _delay("intent")
+    return {"results": [_classify_intent(text) for text in body["texts"]]}
+
+
+@app.post("/sentiment")
+async def sentiment(request: Request):
+    body = await request.json()
+    await _delay("sentiment")
+    return _classify_sentiment(body["text"])
+
+
+@app.post("/sentiment/batch")
+async def sentiment_batch(request: Request):
+    body = await request.json()
+    await _delay("sentiment")
+    return {"results": [_classify_sentiment(text) for text in body["texts"]]}
+
+
+@app.post("/rag")
+async def rag(request: Request):
+    body = await request.json()
+    await _delay("rag")
+    return {"answer": f"Policy answer for: {body['query']}"}
+
+
+@app.post("/tools/{name}")
+async def tool(name: str, request: Request):
+    args = await request.json()
+    await _delay("tool")
+    return {"data": {"tool": name, "status": "ok", "request": args}}
+
+
+def _canned_completion(prompt: str) -> str:
+    # After a tool response the model answers in prose; otherwise it calls the intent's tool
+    last_turn = prompt.rsplit("<|im_start|>", 2)[-2] if prompt.count("<|im_start|>") >= 2 else ""
+    intents = _INTENT_RE.findall(prompt)
+    intent = intents[-1] if intents else "query_policy_rag_db"
+    tools = INTENT_TOOL_MAP.get(intent)
+
+    if last_turn.startswith("tool") or not tools:
+        return "Thought: I have the result.\nResponse: Here is what I found for you."
+
+    tool = tools[0]
+    args = {param: "BENCH123" for param in tool["parameters"].get("required", [])}
+    if tool["name"] == "query_policy_rag_db":
+        args["query"] = "baggage policy"
+    call = json.dumps({"name": tool["name"], "arguments": args})
+    return f"Thought: I should call {tool['name']}.\n<tool_call>{call}</tool_call>\nResponse: Let me check that."
+
+
+@app.post("/model/{model_id:path}/invoke")
+async def bedrock_invoke(model_id: str, request: Request):
+    payload = json.loads(await request.body())
+    await _delay("bedrock")
+    text = _canned_completion(payload["prompt"])
+    headers = {
+        "x-amzn-bedrock-input-token-count": str(len(payload["prompt"]) // 4),
+        "x-amzn-bedrock-output-token-count": str(len(text) // 4),
+    }
+    return JSONResponse({"outputs": [{"text": text, "stop_reason": "stop"}]}, headers=headers)
@@ -0,0 +1,283 @@
+"""
+Replay multi-turn chat sessions against the orchestrator running on local stand-ins.
+
+Starts bench/fake_services.py and the FastAPI app as subprocesses, replays the JSONL
+corpus at the requested concurrency and reports p50/p95/p99 per endpoint and per graph
+node (from /metrics), throughput and the app's peak RSS.
+
+    python -m bench.run_bench --concurrency 32 --repeat 20
+    python -m bench.run_bench --redis --output bench_output.json
+    python -m bench.run_bench --baseline bench/baseline.json --max-regression 0.2   # CI gate
+
+Without --redis the app uses the in-memory checkpointer; --redis needs a Redis Stack
+server (RediSearch module) at REDIS_HOST/REDIS_PORT.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "sessions.jsonl")
+NODE_METRIC = "orchestrator_node_latency_seconds"
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def app_env(args) -> dict:
+    fake = f"http://127.0.0.1:{args.fake_port}"
+    env = dict(os.environ)
+
+    with open(os.path.join(ROOT_DIR, "INTENT_TOOL_MAP.json"), encoding="utf-8") as f:
+        for tool_name in json.load(f):
+            env[f"{tool_name.upper()}_API_URL"] = tool_name
+
+    env.update({
+        "NON_AI_API_URL": f"{fake}/tools/",
+        "INTENT_API_URL": f"{fake}/intent",
+        "SENTIMENT_API_URL": f"{fake}/sentiment",
+        "RAG_API_URL": f"{fake}/rag",
+        "BEDROCK_ENDPOINT_URL": fake,
+        "BEDROCK_REGION": "us-east-1",
+        "BEDROCK_MODEL_ID": "bench-model",
+        # Take the ambient-credentials path; the stub ignores signatures
+        "AWS_EXECUTION_ENV": "bench",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "REDIS_HOST": os.environ.get("REDIS_HOST", "127.0.0.1"),
+        "REDIS_PORT": os.environ.get("REDIS_PORT", "6379"),
+        "CHECKPOINT_BACKEND": "redis" if args.redis else "memory",
+    })
+    if not args.redis:
+        env.setdefault("HISTORY_AUDIT_ENABLED", "false")
+        env.setdefault("TOOL_CACHE_ENABLED", "false")
+    if args.batch_classifiers:
+        env["INTENT_BATCH_API_URL"] = f"{fake}/intent/batch"
+        env["SENTIMENT_BATCH_API_URL"] = f"{fake}/sentiment/batch"
+    return env
+
+
+def start_server(module: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR,
+        env=env,
+    )
+
+
+async def wait_healthy(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become healthy within {timeout}s")
+
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+    }
+
+
+def node_buckets(metrics_text: str) -> dict:
+    """node -> {upper bound: cumulative count} for the node latency histogram."""
+    buckets = defaultdict(dict)
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != NODE_METRIC:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                buckets[sample.labels["node"]][float(sample.labels["le"])] = sample.value
+    return buckets
+
+
+def histogram_quantile(q: float, buckets: dict) -> float:
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if not total:
+        return 0.0
+    rank, previous_bound, previous_count = q * total, 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == float("inf"):
+                return previous_bound
+            fraction = (rank - previous_count) / (count - previous_count) if count > previous_count else 0.0
+            return previous_bound + (bound - previous_bound) * fraction
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def node_report(before: str, after: str) -> dict:
+    start, end = node_buckets(before), node_buckets(after)
+    report = {}
+    for node, buckets in end.items():
+        delta = {bound: count - start.get(node, {}).get(bound, 0.0) for bound, count in buckets.items()}
+        report[node] = {
+            "count": int(delta.get(float("inf"), 0)),
+            **{f"p{int(q * 100)}_ms": round(histogram_quantile(q, delta) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+        }
+    return report
+
+
+def peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+async def replay_session(client, session: dict, run_id: str, index: int, latencies: dict, errors: list) -> None:
+    session_id = f"bench-{run_id}-{index}-{session['session']}"
+    for turn in session["turns"]:
+        body = {"session_id": session_id, "message": {"role": "user", "content": turn["text"]}}
+        start = time.perf_counter()
+        try:
+            r = await client.post("/chat", json=body)
+            elapsed = time.perf_counter() - start
+            if r.status_code != 200 or "error" in r.json():
+                errors.append(f"{session_id}: {r.text[:200]}")
+            latencies["/chat"].append(elapsed)
+        except httpx.HTTPError as e:
+            errors.append(f"{session_id}: {e}")
+
+
+async def run_load(args, corpus: list) -> dict:
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    latencies, errors = defaultdict(list), []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # One warm-up pass so first-request costs are excluded from the numbers
+        await replay_session(client, corpus[0], "warmup", 0, defaultdict(list), [])
+        metrics_before = (await client.get("/metrics")).text
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        run_id = uuid.uuid4().hex[:8]
+        sessions = [(i, s) for i in range(args.repeat) for s in corpus]
+
+        async def bounded(index, session):
+            async with semaphore:
+                await replay_session(client, session, run_id, index, latencies, errors)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(i, s) for i, s in sessions))
+        wall = time.perf_counter() - started
+
+        metrics_after = (await client.get("/metrics")).text
+
+    turns = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": args.concurrency,
+        "sessions": len(sessions),
+        "turns": turns,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_seconds": round(wall, 2),
+        "throughput_turns_per_s": round(turns / wall, 2) if wall else 0.0,
+        "endpoints": {endpoint: summarize(samples) for endpoint, samples in latencies.items()},
+        "nodes": node_report(metrics_before, metrics_after),
+    }
+
+
+def check_regression(result: dict, baseline: dict, max_regression: float) -> list:
+    failures = []
+    for endpoint, stats in baseline.get("endpoints", {}).items():
+        current = result["endpoints"].get(endpoint)
+        if current and current["p95_ms"] > stats["p95_ms"] * (1 + max_regression):
+            failures.append(f"{endpoint} p95 {current['p95_ms']}ms > baseline {stats['p95_ms']}ms (+{max_regression:.0%})")
+    if result["throughput_turns_per_s"] < baseline.get("throughput_turns_per_s", 0) * (1 - max_regression):
+        failures.append(
+            f"throughput {result['throughput_turns_per_s']}/s < baseline {baseline['throughput_turns_per_s']}/s (-{max_regression:.0%})"
+        )
+    return failures
+
+
+def print_report(result: dict) -> None:
+    print(f"\nsessions={result['sessions']} turns={result['turns']} errors={result['errors']} "
+          f"wall={result['wall_seconds']}s throughput={result['throughput_turns_per_s']} turns/s "
+          f"peak_rss={result['peak_rss_mb']}MB")
+    print(f"\n{'':24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in [*result["endpoints"].items(), *result["nodes"].items()]:
+        print(f"{name:24}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    for sample in result["error_samples"]:
+        print(f"error: {sample}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--concurrency", type=int, default=16, help="sessions in flight at once")
+    parser.add_argument("--repeat", type=int, default=10, help="times to replay the corpus")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--app-port", type=int, default=18065)
+    parser.add_argument("--fake-port", type=int, default=18066)
+    parser.add_argument("--redis", action="store_true", help="use Redis at REDIS_HOST/REDIS_PORT for checkpoints and caches")
+    parser.add_argument("--batch-classifiers", action="store_true", help="enable classifier micro-batching")
+    parser.add_argument("--output", help="write the JSON result here")
+    parser.add_argument("--baseline", help="JSON result to compare against; exits 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    fake_env = {**os.environ, "FAKE_CORPUS": os.path.abspath(args.corpus)}
+    fake = start_server("bench.fake_services:app", args.fake_port, fake_env)
+    app = start_server("app.main:app", args.app_port, app_env(args))
+
+    try:
+        asyncio.run(wait_healthy(f"http://127.0.0.1:{args.fake_port}/health"))
+        asyncio.run(wait_healthy(f"http://127.0.0.1:{args.app_port}/ready"))
+        result = asyncio.run(run_load(args, corpus))
+        result["peak_rss_mb"] = peak_rss_mb(app.pid)
+    finally:
+        for proc in (app, fake):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    failures = [f"{result['errors']} failed turns"] if result["errors"] else []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += check_regression(result, json.load(f), args.max_regression)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+# app.config reads every backend URL at import time; point them somewhere harmless
+with open(os.path.join(ROOT_DIR, "INTENT_TOOL_MAP.json"), encoding="utf-8") as f:
+    for tool_name in json.load(f):
+        os.environ.setdefault(f"{tool_name.upper()}_API_URL", tool_name)
+
+for key, value in {
+    "NON_AI_API_URL": "http://tools.test/",
+    "INTENT_API_URL": "http://intent.test/",
+    "SENTIMENT_API_URL": "http://sentiment.test/",
+    "RAG_API_URL": "http://rag.test/",
+    "BEDROCK_REGION": "us-east-1",
+    "BEDROCK_MODEL_ID": "test-model",
+    "REDIS_HOST": "127.0.0.1",
+    "REDIS_PORT": "6379",
+}.items():
+    os.environ.setdefault(key, value)
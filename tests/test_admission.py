@@ -0,0 +1,272 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.admission import AdaptiveLimiter, OverloadedError
+from app.config import settings
+from app.deadline import DeadlineExceeded
+
+
+def make_limiter(**kwargs) -> AdaptiveLimiter:
+    options = {"limit": 2, "max_queue": 2, "queue_timeout": 1.0}
+    options.update(kwargs)
+    return AdaptiveLimiter("test", **options)
+
+
+def test_admits_up_to_limit_without_queueing():
+    async def scenario():
+        limiter = make_limiter()
+        await limiter.acquire()
+        await limiter.acquire()
+        assert limiter.in_flight == 2
+        limiter.release()
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_admitted_in_fifo_order():
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        await limiter.acquire()
+        order = []
+
+        async def waiter(tag):
+            await limiter.acquire()
+            order.append(tag)
+
+        tasks = [asyncio.create_task(waiter(tag)) for tag in ("a", "b")]
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 2
+
+        limiter.release()
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b"]
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_sheds_when_queue_is_full():
+    async def scenario():
+        limiter = make_limiter(limit=1, max_queue=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as excinfo:
+            await limiter.acquire()
+        assert excinfo.value.retry_after >= 1
+        assert limiter.shed == 1
+
+        limiter.release()
+        await queued
+
+    asyncio.run(scenario())
+
+
+def test_sheds_when_queue_wait_expires():
+    async def scenario():
+        limiter = make_limiter(limit=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(OverloadedError):
+            await limiter.acquire()
+        assert limiter.stats()["queued"] == 0
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+
+        assert limiter.in_flight == 0
+        assert limiter.stats()["queued"] == 0
+        await limiter.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_slot_releases_on_error():
+    async def scenario():
+        limiter = make_limiter()
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("backend failed")
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_limit_grows_additively_on_fast_calls():
+    limiter = make_limiter(limit=4, min_limit=1, max_limit=8, target_latency=1.0)
+    limiter._take()
+    limiter.release(latency=0.1)
+    assert limiter.limit == pytest.approx(4.25)
+
+
+def test_limit_backs_off_multiplicatively_on_slow_or_failed_calls():
+    limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=1.0)
+    limiter._take()
+    limiter.release(latency=2.0)
+    assert limiter.limit == pytest.approx(8 * settings.ADMISSION_BACKOFF_RATIO)
+
+    # At most one decrease per target_latency window
+    limiter._take()
+    limiter.release(latency=0.1, failed=True)
+    assert limiter.limit == pytest.approx(8 * settings.ADMISSION_BACKOFF_RATIO)
+
+
+def test_limit_stays_within_bounds():
+    limiter = make_limiter(limit=2, min_limit=2, max_limit=2, target_latency=1.0)
+    limiter._take()
+    limiter.release(latency=5.0)
+    assert limiter.limit == 2
+    limiter._take()
+    limiter.release(latency=0.1)
+    assert limiter.limit == 2
+
+
+def test_fixed_limit_without_target_latency():
+    limiter = make_limiter(limit=3)
+    limiter._take()
+    limiter.release(latency=10.0, failed=True)
+    assert limiter.limit == 3
+
+
+def test_backend_error_in_slot_backs_off():
+    async def scenario():
+        limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=1.0)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("backend failed")
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == pytest.approx(8 * settings.ADMISSION_BACKOFF_RATIO)
+
+
+def test_deadline_in_slot_does_not_back_off():
+    async def scenario():
+        limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=1.0)
+        with pytest.raises(DeadlineExceeded):
+            async with limiter.slot():
+                raise DeadlineExceeded("turn budget ran out")
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_cancellation_in_slot_does_not_back_off():
+    async def scenario():
+        limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=1.0)
+
+        async def call():
+            async with limiter.slot():
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+
+def test_deadline_after_overrunning_target_counts_as_slow():
+    async def scenario():
+        limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=0.01)
+        with pytest.raises(DeadlineExceeded):
+            async with limiter.slot():
+                await asyncio.sleep(0.02)
+                raise DeadlineExceeded("turn budget ran out")
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == pytest.approx(8 * settings.ADMISSION_BACKOFF_RATIO)
+
+
+def test_executor_slot_is_held_until_the_thread_finishes():
+    release = threading.Event()
+
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            call = asyncio.create_task(limiter.run_in_executor(executor, release.wait, 5))
+            await asyncio.sleep(0.05)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            # The caller gave up but the thread is still running
+            assert limiter.in_flight == 1
+
+            release.set()
+            for _ in range(100):
+                if limiter.in_flight == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_executor_call_cancelled_before_starting_frees_its_slot():
+    busy = threading.Event()
+
+    async def scenario():
+        limiter = make_limiter(limit=2)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            running = asyncio.create_task(limiter.run_in_executor(executor, busy.wait, 5))
+            queued = asyncio.create_task(limiter.run_in_executor(executor, lambda: None))
+            await asyncio.sleep(0.05)
+            assert limiter.in_flight == 2
+
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            await asyncio.sleep(0)
+            assert limiter.in_flight == 1
+
+            busy.set()
+            await running
+            await asyncio.sleep(0)
+            assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_executor_error_counts_as_failure():
+    def fail():
+        raise RuntimeError("bedrock error")
+
+    async def scenario():
+        limiter = make_limiter(limit=8, min_limit=2, max_limit=8, target_latency=1.0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(RuntimeError):
+                await limiter.run_in_executor(executor, fail)
+        await asyncio.sleep(0)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.limit == pytest.approx(8 * settings.ADMISSION_BACKOFF_RATIO)
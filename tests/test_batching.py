@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import httpx
+from prometheus_client import REGISTRY
+
+from app import batching
+from app.batching import MicroBatcher
+
+
+def _batch_size_sum(name):
+    return REGISTRY.get_sample_value("orchestrator_classifier_batch_size_sum", {"classifier": name}) or 0
+
+
+def test_batch_is_fanned_out_and_its_send_task_is_held(monkeypatch):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(request):
+            await gate.wait()
+            texts = json.loads(request.content)["texts"]
+            return httpx.Response(200, json={"results": [{"intent": text.upper()} for text in texts]})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(batching, "get_async_client", lambda: client)
+        batcher = MicroBatcher("test-intent", "http://c/single", "http://c/batch", window_ms=1, max_batch_size=8, timeout=1)
+
+        calls = [asyncio.create_task(batcher.submit(text)) for text in ("a", "b", "c")]
+        await asyncio.sleep(0.05)
+        assert len(batcher._sending) == 1
+
+        gate.set()
+        results = await asyncio.gather(*calls)
+        await asyncio.sleep(0)
+        assert not batcher._sending
+        return results
+
+    before = _batch_size_sum("test-intent")
+    assert asyncio.run(scenario()) == [{"intent": "A"}, {"intent": "B"}, {"intent": "C"}]
+    assert _batch_size_sum("test-intent") - before == 3
@@ -0,0 +1,25 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+@pytest.mark.parametrize("field, value", [
+    ("CHECKPOINT_MODE", "every-step"),
+    ("CHECKPOINT_BACKEND", "postgres"),
+    ("MESSAGE_STORE", "redis-list"),
+])
+def test_unknown_mode_is_rejected_at_startup(monkeypatch, field, value):
+    monkeypatch.setenv(field, value)
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_known_modes_are_accepted(monkeypatch):
+    monkeypatch.setenv("CHECKPOINT_MODE", "tool_boundary")
+    monkeypatch.setenv("CHECKPOINT_BACKEND", "memory")
+    monkeypatch.setenv("MESSAGE_STORE", "redis_list")
+    settings = Settings()
+    assert (settings.CHECKPOINT_MODE, settings.CHECKPOINT_BACKEND, settings.MESSAGE_STORE) == (
+        "tool_boundary", "memory", "redis_list"
+    )
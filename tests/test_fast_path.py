@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from app import http_client, nodes, router
+from app.config import settings
+from app.fast_path import build_fast_tool_call, extract_arguments
+from app.graph import workflow_factory
+
+LOOKUP = {"name": "get_flight_status", "parameters": {"required": ["confirmation_number"]}}
+RAG = {"name": "check_baggage_allowance", "parameters": {"required": []}}
+STATE_CHANGING = {"name": "check_in", "parameters": {"required": ["flight_number"]}}
+
+
+@pytest.fixture(autouse=True)
+def fast_path_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_PATH_ENABLED", True)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What's the status of YEYE2K?", {"confirmation_number": "YEYE2K"}),
+    ("status of YEYE2K, booking YEYE2K", {"confirmation_number": "YEYE2K"}),
+    ("status of YEYE2K or ABC123", None),      # ambiguous
+    ("status of flight UA1234", None),         # flight-number shaped, not a record locator
+    ("status of my flight", None),
+    ("status of yeye2k", None),
+])
+def test_extract_booking_reference(text, expected):
+    assert extract_arguments(LOOKUP, text) == expected
+
+
+def test_extract_flight_number_email_and_phone():
+    tool = {"parameters": {"required": ["flight_number", "email", "phone_number"]}}
+    assert extract_arguments(tool, "UA 1234, jo@example.com, +1 (555) 123-4567") == {
+        "flight_number": "UA1234",
+        "email": "jo@example.com",
+        "phone_number": "+15551234567",
+    }
+
+
+def test_parameters_without_extractor_go_to_the_model():
+    tool = {"parameters": {"required": ["booking_reference", "last_name"]}}
+    assert extract_arguments(tool, "YEYE2K, Smith") is None
+
+
+def test_builds_lookup_call():
+    call = build_fast_tool_call(LOOKUP, "Status of YEYE2K?", "get_flight_status", 0.95, is_rag=False)
+    assert json.loads(call) == {"name": "get_flight_status", "arguments": {"confirmation_number": "YEYE2K"}}
+
+
+def test_rag_call_passes_the_question_through():
+    call = build_fast_tool_call(RAG, "  How many bags can I bring?  ", "check_baggage_allowance", 0.95, is_rag=True)
+    assert json.loads(call) == {"name": "check_baggage_allowance", "arguments": {"query": "How many bags can I bring?"}}
+
+
+def test_only_allowlisted_intents_qualify():
+    assert "check_in" not in settings.FAST_PATH_INTENTS
+    assert build_fast_tool_call(STATE_CHANGING, "Check me in on UA1234", "check_in", 0.99, is_rag=False) is None
+
+
+def test_disabled_fast_path_builds_nothing(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_PATH_ENABLED", False)
+    assert build_fast_tool_call(LOOKUP, "Status of YEYE2K?", "get_flight_status", 0.99, is_rag=False) is None
+
+
+@pytest.mark.parametrize("confidence", [0.0, 0.5, 0.89])
+def test_low_confidence_goes_to_the_model(confidence):
+    assert build_fast_tool_call(LOOKUP, "Status of YEYE2K?", "get_flight_status", confidence, is_rag=False) is None
+
+
+def test_lookup_without_required_arguments_goes_to_the_model():
+    tool = {"name": "get_flight_status", "parameters": {"required": []}}
+    assert build_fast_tool_call(tool, "Status?", "get_flight_status", 0.99, is_rag=False) is None
+
+
+@pytest.fixture
+def workflow(monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_AUDIT_ENABLED", False)
+    monkeypatch.setattr(settings, "TOOL_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+
+    async def classify(text):
+        return {"intent": "check_baggage_allowance", "confidence": 0.95}
+
+    async def sentiment(text):
+        return {"sentiment": "Neutral"}
+
+    bedrock_calls = []
+
+    def invoke_bedrock(payload):
+        bedrock_calls.append(payload)
+        return {"outputs": [{"text": "Response: Let me look that up."}]}, (1, 1)
+
+    monkeypatch.setattr(nodes.intent_batcher, "submit", classify)
+    monkeypatch.setattr(nodes.sentiment_batcher, "submit", sentiment)
+    monkeypatch.setattr(nodes, "_invoke_bedrock", invoke_bedrock)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"answer": "Two bags."}))
+    monkeypatch.setattr(http_client, "_async_client", httpx.AsyncClient(transport=transport))
+
+    monkeypatch.setattr(workflow_factory, "saver", MemorySaver())
+    monkeypatch.setattr(workflow_factory, "_compiled", None)
+    return workflow_factory.reload(), bedrock_calls
+
+
+def test_checkpointed_intent_takes_the_llm_path(workflow):
+    compiled, bedrock_calls = workflow
+
+    async def scenario():
+        routes = []
+        for text in ["How many bags can I bring?", "And can I take a pet?"]:
+            deadline = router.deadline_after(None)
+            response = await router.run_chat_turn(compiled, text, "user", "fast-path-session", deadline)
+            routes.append(response["route"])
+        return routes
+
+    # Turn 2 keeps the turn-1 intent without classifying, so its confidence is unknown
+    assert asyncio.run(scenario()) == ["fast_path", "llm"]
+    assert len(bedrock_calls) == 1
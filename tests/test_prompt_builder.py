@@ -0,0 +1,61 @@
+from jinja2 import Template
+
+from app.prompt_builder import BOS_TOKEN, CHAT_TEMPLATE, PromptBuilder
+
+
+def reference(messages) -> str:
+    return Template(CHAT_TEMPLATE).render(messages=messages, bos_token=BOS_TOKEN, add_generation_prompt=True)
+
+
+def test_matches_template_across_turns():
+    builder = PromptBuilder(max_threads=8)
+    messages = [{"role": "system", "content": "You are a function calling AI model."}]
+    turns = [
+        [{"role": "user", "content": "[intent=check_flight_status][sentiment=Neutral] Status of YEYE2K?"}],
+        [
+            {"role": "assistant", "content": '<tool_call>{"name": "check_flight_status"}</tool_call>'},
+            {"role": "tool", "content": "<tool_response>{\"status\":\"on time\"}</tool_response>"},
+        ],
+        [{"role": "user", "content": "Thanks!\nAnything else?"}],
+    ]
+    for new_messages in turns:
+        messages = messages + new_messages
+        assert builder.build("t1", messages) == reference(messages)
+
+
+def test_matches_template_for_unknown_roles():
+    builder = PromptBuilder(max_threads=8)
+    messages = [
+        {"role": "system", "content": "sys"},
+        {"role": "developer", "content": "ignored by the template"},
+        {"role": "user", "content": "hi"},
+        {"content": "no role"},
+    ]
+    assert builder.build("t1", messages) == reference(messages)
+    assert builder.build("t1", messages) == reference(messages)
+
+
+def test_matches_template_when_system_prompt_changes():
+    builder = PromptBuilder(max_threads=8)
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    first = [{"role": "system", "content": "tools v1"}] + history
+    second = [{"role": "system", "content": "tools v1\n\nSummary of the earlier conversation:\nUser: hi"}] + history
+    assert builder.build("t1", first) == reference(first)
+    assert builder.build("t1", second) == reference(second)
+
+
+def test_matches_template_for_empty_and_unnamed_threads():
+    builder = PromptBuilder(max_threads=1)
+    assert builder.build("t1", []) == reference([])
+    messages = [{"role": "user", "content": "hi"}]
+    assert builder.build("", messages) == reference(messages)
+
+
+def test_threads_do_not_share_blocks_and_are_bounded():
+    builder = PromptBuilder(max_threads=1)
+    a = [{"role": "user", "content": "a"}]
+    b = [{"role": "user", "content": "b"}]
+    assert builder.build("t1", a) == reference(a)
+    assert builder.build("t2", b) == reference(b)
+    assert list(builder._threads) == ["t2"]
+    assert builder.build("t1", a + b) == reference(a + b)
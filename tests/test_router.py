@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app import router as router_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    turns = []
+
+    async def fake_run_chat_turn(workflow, content, role, session_id, deadline):
+        turns.append((session_id, content))
+        return {"messages": [{"role": role, "content": content}], "route": "llm"}
+
+    async def fake_workflow():
+        return None
+
+    monkeypatch.setattr(router_module, "run_chat_turn", fake_run_chat_turn)
+    monkeypatch.setattr(router_module, "get_compiled_workflow", fake_workflow)
+
+    app = FastAPI()
+    app.include_router(router_module.router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test"), turns
+
+
+def _post_batch(client, items):
+    async def scenario():
+        async with client as c:
+            response = await asyncio.wait_for(c.post("/chat/batch", json={"items": items}), 5)
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("content", [123, None, ["a"]])
+def test_batch_malformed_item_does_not_stall_its_session(client, content):
+    http, turns = client
+    frames = _post_batch(http, [
+        {"session_id": "s1", "message": {"role": "user", "content": content}},
+        {"session_id": "s1", "message": {"role": "user", "content": "hello"}},
+    ])
+
+    by_index = {frame["index"]: frame for frame in frames if "index" in frame}
+    assert by_index[0]["type"] == "error"
+    assert by_index[0]["session_id"] == "s1"
+    assert by_index[1]["type"] == "result"
+    assert frames[-1] == {"type": "done", "succeeded": 1, "failed": 1}
+    assert turns == [("s1", "hello")]
+
+
+def test_batch_non_object_item_is_reported(client):
+    http, turns = client
+    frames = _post_batch(http, ["not an object", {"session_id": "s2", "message": {"role": "user", "content": "hi"}}])
+    assert frames[-1] == {"type": "done", "succeeded": 1, "failed": 1}
+
+
+@pytest.mark.parametrize("message, error", [
+    ({"role": "user", "content": 123}, "Message content must be a string."),
+    ({"role": "user", "content": "   "}, "Message content is empty."),
+    ({"role": None, "content": "hi"}, "Invalid message role. Must be 'user' or 'tool'."),
+])
+def test_parse_chat_request_rejects_bad_messages(message, error):
+    assert router_module.parse_chat_request({"message": message}) == {"error": error}
+
+
+def test_history_is_not_on_the_public_router():
+    from app.main import app
+
+    def paths(routes):
+        return {route.path for route in routes}
+
+    assert "/history/{session_id}" not in paths(router_module.router.routes)
+    assert "/history/{session_id}" in paths(router_module.internal_router.routes)
+    assert "/history/{session_id}" not in paths(app.routes)
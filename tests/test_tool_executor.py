@@ -0,0 +1,201 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app import tool_executor
+from app.admission import OverloadedError
+from app.tool_executor import CircuitBreaker, CircuitOpenError, post_tool
+
+URL = "http://tools.test/check_flight_status"
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("b", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_admits_a_single_trial():
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes_breaker():
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_circuit_gauge_follows_breaker():
+    def circuit_open():
+        return REGISTRY.get_sample_value("orchestrator_tool_circuit_open", {"backend": "gauge-test"})
+
+    breaker = CircuitBreaker("gauge-test", failure_threshold=2, reset_timeout=0)
+    assert circuit_open() == 0
+    breaker.record_failure()
+    assert circuit_open() == 0
+    breaker.record_failure()
+    assert circuit_open() == 1
+    assert breaker.allow()
+    breaker.record_success()
+    assert circuit_open() == 0
+
+def test_released_trial_can_be_retried():
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+class _Limiter:
+    def __init__(self, error=None):
+        self.error = error
+
+    def slot(self):
+        limiter = self
+
+        class _Slot:
+            async def __aenter__(self):
+                if limiter.error is not None:
+                    raise limiter.error
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Slot()
+
+
+class _Client:
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def post(self, url, json, timeout):
+        return await self.handler()
+
+
+@pytest.fixture
+def half_open_breaker(monkeypatch):
+    monkeypatch.setattr(tool_executor, "_breakers", {})
+    breaker = tool_executor.get_breaker(URL)
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0
+    breaker.record_failure()
+    return breaker
+
+
+def _use(monkeypatch, client=None, limiter=None):
+    monkeypatch.setattr(tool_executor, "get_async_client", lambda: client)
+    monkeypatch.setattr(tool_executor, "get_backend_limiter", lambda url: limiter or _Limiter())
+
+
+def test_cancelled_trial_releases_breaker(monkeypatch, half_open_breaker):
+    async def hang():
+        await asyncio.sleep(10)
+
+    _use(monkeypatch, client=_Client(hang))
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(post_tool("check_flight_status", URL, {}, timeout=1), 0.01)
+
+    asyncio.run(scenario())
+    assert half_open_breaker.allow()
+
+
+def test_shed_trial_releases_breaker(monkeypatch, half_open_breaker):
+    _use(monkeypatch, limiter=_Limiter(OverloadedError(URL, 1)))
+
+    with pytest.raises(OverloadedError):
+        asyncio.run(post_tool("check_flight_status", URL, {}, timeout=1))
+    assert half_open_breaker.allow()
+
+
+def test_trial_in_flight_blocks_other_calls(monkeypatch, half_open_breaker):
+    assert half_open_breaker.allow()
+    _use(monkeypatch)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(post_tool("check_flight_status", URL, {}, timeout=1))
+
+
+def test_failed_trial_reopens_and_successful_trial_closes(monkeypatch, half_open_breaker):
+    monkeypatch.setattr(tool_executor.settings, "TOOL_MAX_RETRIES", 0)
+
+    async def error():
+        raise httpx.ConnectError("refused")
+
+    _use(monkeypatch, client=_Client(error))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(post_tool("check_flight_status", URL, {}, timeout=1))
+    assert half_open_breaker.state == "half_open"
+
+    async def ok():
+        return httpx.Response(200, json={})
+
+    _use(monkeypatch, client=_Client(ok))
+    asyncio.run(post_tool("check_flight_status", URL, {}, timeout=1))
+    assert half_open_breaker.state == "closed"
+
+
+@pytest.mark.parametrize("name, attempts", [
+    ("check_in", 1),
+    ("check_in_passenger", 1),
+    ("get_refund", 1),
+    ("check_flight_status", 3),
+])
+def test_only_read_only_tools_are_retried(monkeypatch, name, attempts):
+    monkeypatch.setattr(tool_executor, "_breakers", {})
+    monkeypatch.setattr(tool_executor.settings, "TOOL_MAX_RETRIES", 2)
+    monkeypatch.setattr(tool_executor, "_backoff_delay", lambda attempt: 0)
+    calls = []
+
+    async def timeout():
+        calls.append(1)
+        raise httpx.ReadTimeout("no response")
+
+    _use(monkeypatch, client=_Client(timeout))
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(post_tool(name, URL, {}, timeout=1))
+    assert len(calls) == attempts
+
+
+def test_limiter_is_shared_per_service_and_breaker_per_endpoint(monkeypatch):
+    monkeypatch.setattr(tool_executor, "_breakers", {})
+    services = []
+
+    def limiter_for(service):
+        services.append(service)
+        return _Limiter()
+
+    async def ok():
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(tool_executor, "get_async_client", lambda: _Client(ok))
+    monkeypatch.setattr(tool_executor, "get_backend_limiter", limiter_for)
+    asyncio.run(post_tool("check_flight_status", "http://tools.test/a", {}, timeout=1))
+    asyncio.run(post_tool("get_flight_status", "http://tools.test/b", {}, timeout=1))
+    asyncio.run(post_tool("query_policy_rag_db", "http://rag.test/", {}, timeout=1, service="rag"))
+
+    assert services == ["tools", "tools", "rag"]
+    assert set(tool_executor._breakers) == {"http://tools.test/a", "http://tools.test/b", "http://rag.test/"}